@@ -0,0 +1,276 @@
+"""增量资源处理流水线（取代原来逐像素重建图像的 fix_images.py）
+
+1. 去除图片元数据：直接在文件格式层面删除ICC配置、EXIF/XMP和注释等数据块，
+   不解码、不重新编码像素，动画GIF的所有帧、时长和循环设置原样保留；
+2. 清单文件记录每个文件的大小、修改时间和哈希，只处理变化过的文件；
+3. 变化的文件分发到多个进程并行处理；
+4. 预先生成 main.py 运行时加载的帧（抠图后按帧金字塔各级缩放的RGBA），写入 baked_frames 目录，
+   把最耗时的处理从程序启动挪到构建阶段。
+
+用法: python asset_pipeline.py [--force] [--workers N] [--no-bake]
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from frame_cache import FrameCache
+from frame_pyramid import level_sizes
+from parallel_decode import ParallelDecoder, default_workers
+from pet_assets import ANIMATION_FILES, BAKED_FRAMES_DIR
+
+MANIFEST_FILE = ".asset_manifest.json"
+MANIFEST_VERSION = 1
+ASSET_FOLDERS = ["Bochhi/DeskPets", "images"]
+SUPPORTED_EXTS = (".png", ".jpg", ".jpeg", ".gif", ".bmp")
+
+# GIF中属于元数据的应用扩展（ICC配置、XMP）
+GIF_METADATA_APPS = (b"ICCRGBG1", b"XMP Data")
+# PNG中可以安全删除的元数据块
+PNG_METADATA_CHUNKS = {b"iCCP", b"tEXt", b"zTXt", b"iTXt", b"eXIf", b"tIME"}
+# JPEG中的元数据段：APP1(EXIF/XMP)、APP2(ICC)、APP13(Photoshop)、COM
+JPEG_METADATA_MARKERS = {0xE1, 0xE2, 0xED, 0xFE}
+
+
+def _skip_sub_blocks(data, pos):
+    """跳过GIF的数据子块序列，返回结束符之后的位置"""
+    while True:
+        size = data[pos]
+        pos += 1
+        if size == 0:
+            return pos
+        pos += size
+
+
+def strip_gif(data):
+    """删除GIF中的注释和ICC/XMP应用扩展，其余字节（帧、时长、循环）保持不变"""
+    if data[:6] not in (b"GIF87a", b"GIF89a"):
+        raise ValueError("不是GIF文件")
+    flags = data[10]
+    pos = 13
+    if flags & 0x80:
+        pos += 3 * (2 ** ((flags & 0x07) + 1))
+    out = bytearray(data[:pos])
+
+    while pos < len(data):
+        block = data[pos]
+        if block == 0x3B:  # 文件结束
+            out.append(0x3B)
+            break
+        if block == 0x2C:  # 图像描述符 + 局部调色板 + LZW数据
+            image_flags = data[pos + 9]
+            end = pos + 10
+            if image_flags & 0x80:
+                end += 3 * (2 ** ((image_flags & 0x07) + 1))
+            end = _skip_sub_blocks(data, end + 1)
+            out += data[pos:end]
+            pos = end
+        elif block == 0x21:  # 扩展块
+            label = data[pos + 1]
+            end = _skip_sub_blocks(data, pos + 2)
+            is_comment = label == 0xFE
+            is_metadata_app = (label == 0xFF and data[pos + 2] == 11
+                               and data[pos + 3:pos + 11] in GIF_METADATA_APPS)
+            if not (is_comment or is_metadata_app):
+                out += data[pos:end]
+            pos = end
+        else:
+            raise ValueError(f"GIF数据块损坏 (偏移 {pos})")
+    return bytes(out)
+
+
+def strip_png(data):
+    """删除PNG中的ICC配置、文本和EXIF等数据块"""
+    signature = b"\x89PNG\r\n\x1a\n"
+    if not data.startswith(signature):
+        raise ValueError("不是PNG文件")
+    out = bytearray(signature)
+    pos = len(signature)
+    while pos + 8 <= len(data):
+        length = int.from_bytes(data[pos:pos + 4], "big")
+        chunk_type = data[pos + 4:pos + 8]
+        end = pos + 12 + length
+        if chunk_type not in PNG_METADATA_CHUNKS:
+            out += data[pos:end]
+        pos = end
+        if chunk_type == b"IEND":
+            break
+    return bytes(out)
+
+
+def strip_jpeg(data):
+    """删除JPEG中的EXIF/XMP、ICC、Photoshop和注释段，压缩数据原样保留"""
+    if not data.startswith(b"\xff\xd8"):
+        raise ValueError("不是JPEG文件")
+    out = bytearray(b"\xff\xd8")
+    pos = 2
+    while pos < len(data):
+        if data[pos] != 0xFF:
+            raise ValueError(f"JPEG段损坏 (偏移 {pos})")
+        marker = data[pos + 1]
+        if marker == 0xFF:  # 填充字节
+            pos += 1
+            continue
+        if marker == 0xDA:  # 扫描开始，之后都是压缩数据
+            out += data[pos:]
+            break
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:  # 无长度的标记
+            out += data[pos:pos + 2]
+            pos += 2
+            continue
+        end = pos + 2 + int.from_bytes(data[pos + 2:pos + 4], "big")
+        if marker not in JPEG_METADATA_MARKERS:
+            out += data[pos:end]
+        pos = end
+    return bytes(out)
+
+
+STRIPPERS = {".gif": strip_gif, ".png": strip_png, ".jpg": strip_jpeg, ".jpeg": strip_jpeg}
+
+
+def strip_metadata(path):
+    """去除单个文件的元数据（子进程任务），返回 (是否改写, 节省的字节数)"""
+    stripper = STRIPPERS.get(os.path.splitext(path)[1].lower())
+    with open(path, "rb") as f:
+        data = f.read()
+    if stripper is None:
+        return False, 0
+
+    try:
+        stripped = stripper(data)
+    except (ValueError, IndexError) as e:
+        raise ValueError(f"{path}: {e}") from None
+    if stripped == data:
+        return False, 0
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(stripped)
+    os.replace(tmp_path, path)
+    return True, len(data) - len(stripped)
+
+
+def file_fingerprint(path):
+    stat = os.stat(path)
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest.get("files", {})
+
+
+def save_manifest(path, files):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "files": files}, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def scan_assets(folders):
+    """列出资源目录下所有支持的图片（相对路径，统一使用/分隔）"""
+    paths = []
+    for folder in folders:
+        for root, _, files in os.walk(folder):
+            for name in files:
+                if name.lower().endswith(SUPPORTED_EXTS):
+                    paths.append(os.path.join(root, name).replace(os.sep, "/"))
+    return sorted(paths)
+
+
+def changed_assets(paths, manifest, force=False):
+    """根据大小和修改时间找出需要处理的文件；二者都没变时不读文件内容"""
+    changed = []
+    for path in paths:
+        entry = manifest.get(path)
+        if force or entry is None:
+            changed.append(path)
+            continue
+        stat = os.stat(path)
+        if stat.st_size != entry["size"] or stat.st_mtime_ns != entry["mtime_ns"]:
+            changed.append(path)
+    return changed
+
+
+def process_assets(paths, workers):
+    """并行去除元数据，返回 {路径: (是否改写, 节省字节数)}，失败的文件不在结果中"""
+    results = {}
+    if workers <= 1:
+        for path in paths:
+            try:
+                results[path] = strip_metadata(path)
+            except (OSError, ValueError) as e:
+                print(f"处理失败 {e}")
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {path: executor.submit(strip_metadata, path) for path in paths}
+        for path, future in futures.items():
+            try:
+                results[path] = future.result()
+            except (OSError, ValueError) as e:
+                print(f"处理失败 {e}")
+    return results
+
+
+def bake_frames(baked_dir, workers, sizes=None):
+    """生成运行时帧（帧金字塔的每一级）：只处理内容变化过的动画，并删除过期的条目"""
+    cache = FrameCache(baked_dir, max_bytes=float("inf"))
+    paths = [path for path in ANIMATION_FILES.values() if os.path.exists(path)]
+    decoder = ParallelDecoder(workers)
+    keys = []
+    try:
+        for size in sizes or level_sizes():
+            keys.extend(cache.warm(paths, decoder, (size, size)).values())
+    finally:
+        decoder.shutdown()
+    removed = cache.retain(keys)
+    return keys, removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="增量处理桌宠的图片资源")
+    parser.add_argument("--force", action="store_true", help="忽略清单，重新处理所有文件")
+    parser.add_argument("--workers", type=int, default=None, help="并行进程数（默认为CPU核数）")
+    parser.add_argument("--no-bake", action="store_true", help="不生成运行时帧")
+    parser.add_argument("--baked-dir", default=BAKED_FRAMES_DIR, help="运行时帧的输出目录")
+    args = parser.parse_args()
+    workers = max(1, args.workers or default_workers())
+
+    start = time.perf_counter()
+    manifest = load_manifest(MANIFEST_FILE)
+    paths = scan_assets(ASSET_FOLDERS)
+    changed = changed_assets(paths, manifest, args.force)
+    results = process_assets(changed, workers)
+
+    # 处理后重新记录指纹；已删除的文件从清单中移除
+    files = {path: manifest[path] for path in paths if path in manifest}
+    saved = 0
+    for path, (rewritten, saved_bytes) in results.items():
+        files[path] = file_fingerprint(path)
+        saved += saved_bytes
+        if rewritten:
+            print(f"已去除元数据: {path} (-{saved_bytes} 字节)")
+    save_manifest(MANIFEST_FILE, files)
+    print(f"共 {len(paths)} 个文件，检查 {len(changed)} 个，改写 "
+          f"{sum(1 for rewritten, _ in results.values() if rewritten)} 个，节省 {saved} 字节")
+
+    if not args.no_bake:
+        keys, removed = bake_frames(args.baked_dir, workers)
+        print(f"运行时帧: {len(keys)} 个条目已就绪，清理过期条目 {removed} 个 -> {args.baked_dir}")
+
+    print(f"完成，耗时 {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""音频引擎
+
+- 混音器在第一次需要时才初始化（在后台线程中），不占用启动路径；
+- 短音效在后台线程解码为 pygame.mixer.Sound；
+- 长曲目通过 pygame.mixer.music 流式播放，不把整首歌解码进内存；
+- 声音可以是文件路径，也可以是桌宠包中的条目（pet_pack.PackEntry，从映射的文件中读取）；
+- 没有pygame或没有音频设备（例如无头CI机器）时静默运行。
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import pygame
+except ImportError:  # 没有pygame时静默运行
+    pygame = None
+
+
+def open_source(source):
+    """桌宠包条目打开为文件对象，文件路径原样返回"""
+    return source.open() if hasattr(source, "open") else source
+
+
+class AudioEngine:
+    def __init__(self, schedule=None, enabled=True):
+        # schedule(毫秒, 回调)：用于限时播放的定时器，一般登记到桌宠的事件循环
+        self.schedule = schedule
+        self.enabled = enabled and pygame is not None
+        self.mixer_ready = False
+        self._mixer_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-load")
+
+        self.sounds = {}  # 名称 -> pygame.mixer.Sound
+        self.streams = {}  # 名称 -> 文件路径或桌宠包条目
+        self.info = {}  # 名称 -> 加载信息
+        # 每次播放流式曲目加一，过期的停止定时器不会打断新的播放
+        self._stream_generation = 0
+
+    def ensure_mixer(self):
+        """按需初始化混音器，没有音频设备时转为静默模式"""
+        if not self.enabled:
+            return False
+        with self._mixer_lock:
+            if self.mixer_ready:
+                return True
+            try:
+                pygame.mixer.init()
+                self.mixer_ready = True
+            except pygame.error as e:
+                print(f"音频设备不可用，静默运行: {e}")
+                self.enabled = False
+            return self.mixer_ready
+
+    def preload(self, name, path):
+        """在后台线程加载短音效"""
+        if not self.enabled:
+            return
+        self._executor.submit(self._load_sound, name, path)
+
+    def _load_sound(self, name, path):
+        if not self.ensure_mixer():
+            return None
+        start = time.perf_counter()
+        try:
+            sound = pygame.mixer.Sound(open_source(path))
+        except (pygame.error, OSError) as e:
+            print(f"无法加载音效 {path}: {e}")
+            return None
+
+        self.info[name] = {
+            "kind": "sound",
+            "path": str(path),
+            "bytes": self._pcm_bytes(sound),
+            "load_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+        self.sounds[name] = sound
+        return sound
+
+    def _pcm_bytes(self, sound):
+        """估算解码后PCM数据的大小"""
+        frequency, sample_format, channels = pygame.mixer.get_init()
+        return int(sound.get_length() * frequency * channels * abs(sample_format) // 8)
+
+    def register_stream(self, name, path):
+        """登记一首流式播放的长曲目（播放时才打开文件）"""
+        self.streams[name] = path
+        try:
+            source_bytes = path.length if hasattr(path, "open") else os.path.getsize(path)
+        except OSError:
+            source_bytes = 0
+        self.info[name] = {"kind": "stream", "path": str(path), "bytes": 0,
+                           "source_bytes": source_bytes, "load_ms": 0.0}
+
+    def play(self, name, loops=0, maxtime=0):
+        """播放已加载的音效，还没加载完时直接跳过"""
+        sound = self.sounds.get(name)
+        if sound is not None:
+            sound.play(loops, maxtime)
+
+    def fadeout(self, name, ms):
+        sound = self.sounds.get(name)
+        if sound is not None:
+            sound.fadeout(ms)
+
+    def play_stream(self, name, maxtime=0):
+        """流式播放长曲目，maxtime（毫秒）后自动停止"""
+        path = self.streams.get(name)
+        if path is None or not self.ensure_mixer():
+            return
+        start = time.perf_counter()
+        try:
+            if hasattr(path, "open"):
+                pygame.mixer.music.load(path.open(), path.ext)
+            else:
+                pygame.mixer.music.load(path)
+            pygame.mixer.music.play()
+        except (pygame.error, OSError) as e:
+            print(f"无法播放 {path}: {e}")
+            return
+        self.info[name]["load_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+        self._stream_generation += 1
+        if maxtime and self.schedule is not None:
+            generation = self._stream_generation
+            self.schedule(maxtime, lambda: self.stop_stream(generation))
+
+    def stop_stream(self, generation=None):
+        if generation is not None and generation != self._stream_generation:
+            return
+        if self.mixer_ready:
+            pygame.mixer.music.stop()
+
+    def report(self):
+        """每个声音的内存占用和加载耗时"""
+        return {name: dict(info) for name, info in self.info.items()}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self.mixer_ready:
+            # 流式播放的曲目可能正从桌宠包的映射中读取，先停止并释放，之后才能关闭桌宠包
+            pygame.mixer.music.stop()
+            pygame.mixer.music.unload()
+            pygame.mixer.quit()
+            self.mixer_ready = False
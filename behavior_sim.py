@@ -0,0 +1,116 @@
+"""批量行为模拟（NumPy向量化）
+
+把N只桌宠的位置、状态和状态计时保存在数组里，一步推进全部桌宠，
+语义与 DesktopPet.step_behavior 相同：
+  - 距上次切换超过 STATE_CHANGE_TIME 秒时，随机切换到另一个状态；
+  - walk 水平随机移动 ±WALK_STEP，dance 两个方向随机移动 ±DANCE_STEP；
+  - 移动后把位置限制在 [0, 屏幕尺寸 - EDGE_MARGIN] 内，sing 不移动。
+不需要打开任何窗口，可以离线模拟成千上万只桌宠来调整行为参数。
+给定 seed 时结果完全可复现，便于在测试中回放。
+
+用法: python behavior_sim.py [--pets 10000] [--seconds 600] [--seed 0]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from pet_behavior import (BEHAVIOR_INTERVAL, BEHAVIOR_STATES, DANCE_STEP, EDGE_MARGIN,
+                          STATE_CHANGE_TIME, WALK_STEP)
+
+WALK, DANCE, SING = (BEHAVIOR_STATES.index(name) for name in ("walk", "dance", "sing"))
+
+
+class BehaviorEngine:
+    def __init__(self, count, screen_size=(1920, 1080), seed=None, start_position=(500, 500),
+                 start_state="sing", state_change_time=STATE_CHANGE_TIME, interval=BEHAVIOR_INTERVAL):
+        self.rng = np.random.default_rng(seed)
+        self.screen_size = screen_size
+        self.state_change_time = state_change_time
+        self.interval = interval
+
+        self.x = np.full(count, start_position[0], dtype=np.int64)
+        self.y = np.full(count, start_position[1], dtype=np.int64)
+        self.state = np.full(count, BEHAVIOR_STATES.index(start_state), dtype=np.int8)
+        self.last_state_change = np.zeros(count)
+        self.time = 0.0
+        self.steps = 0
+
+    @property
+    def count(self):
+        return len(self.x)
+
+    def step(self):
+        """所有桌宠推进一个行为步进"""
+        self.time += self.interval
+        self.steps += 1
+        count = self.count
+
+        # 状态切换：在其余两个状态中等概率选一个
+        due = self.time - self.last_state_change > self.state_change_time
+        if due.any():
+            shift = self.rng.integers(1, len(BEHAVIOR_STATES), size=count)
+            self.state = np.where(due, (self.state + shift) % len(BEHAVIOR_STATES), self.state).astype(np.int8)
+            self.last_state_change = np.where(due, self.time, self.last_state_change)
+
+        walking = self.state == WALK
+        dancing = self.state == DANCE
+
+        # randint 两端都包含，对应 integers(low, high + 1)
+        walk_dx = self.rng.integers(-WALK_STEP, WALK_STEP + 1, size=count)
+        dance_dx = self.rng.integers(-DANCE_STEP, DANCE_STEP + 1, size=count)
+        dance_dy = self.rng.integers(-DANCE_STEP, DANCE_STEP + 1, size=count)
+        self.x += np.where(walking, walk_dx, 0) + np.where(dancing, dance_dx, 0)
+        self.y += np.where(dancing, dance_dy, 0)
+
+        # 只有移动过的桌宠才会被限制在屏幕内
+        moved = walking | dancing
+        max_x = max(0, self.screen_size[0] - EDGE_MARGIN)
+        max_y = max(0, self.screen_size[1] - EDGE_MARGIN)
+        self.x = np.where(moved, np.clip(self.x, 0, max_x), self.x)
+        self.y = np.where(moved, np.clip(self.y, 0, max_y), self.y)
+
+    def run(self, steps, record=False):
+        """连续推进 steps 步；record 为真时返回每一步的 (x, y, state) 轨迹"""
+        if not record:
+            for _ in range(steps):
+                self.step()
+            return None
+
+        xs = np.empty((steps, self.count), dtype=np.int64)
+        ys = np.empty_like(xs)
+        states = np.empty((steps, self.count), dtype=np.int8)
+        for i in range(steps):
+            self.step()
+            xs[i], ys[i], states[i] = self.x, self.y, self.state
+        return xs, ys, states
+
+    def state_counts(self):
+        """各状态当前的桌宠数量"""
+        counts = np.bincount(self.state, minlength=len(BEHAVIOR_STATES))
+        return dict(zip(BEHAVIOR_STATES, counts.tolist()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线批量模拟桌宠行为")
+    parser.add_argument("--pets", type=int, default=10000)
+    parser.add_argument("--seconds", type=float, default=600, help="模拟的时长（秒）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--screen", type=int, nargs=2, default=(1920, 1080), metavar=("W", "H"))
+    args = parser.parse_args()
+
+    engine = BehaviorEngine(args.pets, tuple(args.screen), seed=args.seed)
+    steps = int(args.seconds / engine.interval)
+    start = time.perf_counter()
+    engine.run(steps)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.pets} 只桌宠 x {steps} 步, 耗时 {elapsed:.2f}s "
+          f"({elapsed / steps * 1000:.3f}ms/步, {args.pets * steps / elapsed / 1e6:.1f}M 桌宠步/秒)")
+    print(f"状态分布: {engine.state_counts()}")
+    print(f"位置均值: x={engine.x.mean():.1f}, y={engine.y.mean():.1f}; "
+          f"贴边比例: {np.mean((engine.x == 0) | (engine.x == max(0, args.screen[0] - EDGE_MARGIN))):.3f}")
+
+
+if __name__ == "__main__":
+    main()
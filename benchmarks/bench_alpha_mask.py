@@ -0,0 +1,68 @@
+"""透明度蒙版性能对比：逐像素循环 vs 整帧运算
+
+用法: python benchmarks/bench_alpha_mask.py
+"""
+import os
+import random
+import sys
+import time
+
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gif_frames import build_alpha_mask  # noqa: E402
+
+SIZES = [(120, 120), (240, 240), (480, 480), (960, 960)]
+REPEAT = 3
+
+
+def legacy_mask(frame, transparency):
+    """原 optimize_gif 中的逐像素实现"""
+    mask = Image.new("L", frame.size, 255)
+    mask_data = []
+    for y in range(frame.size[1]):
+        for x in range(frame.size[0]):
+            pix = frame.getpixel((x, y))
+            if isinstance(pix, int) and pix == transparency:
+                mask_data.append(0)
+            elif isinstance(pix, tuple) and pix[3] == 0:
+                mask_data.append(0)
+            else:
+                mask_data.append(255)
+    mask.putdata(mask_data)
+    return mask
+
+
+def make_frame(size, seed):
+    """生成带随机透明区域的RGBA测试帧"""
+    rng = random.Random(seed)
+    data = bytes(rng.choice((0, 0, 1, 128, 255)) if i % 4 == 3 else rng.randrange(256)
+                 for i in range(size[0] * size[1] * 4))
+    return Image.frombytes("RGBA", size, data)
+
+
+def best_of(func, *args):
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'帧尺寸':>10} {'逐像素(ms)':>12} {'整帧(ms)':>10} {'加速比':>8}")
+    for size in SIZES:
+        frame = make_frame(size, seed=size[0])
+        if legacy_mask(frame, 0).tobytes() != build_alpha_mask(frame, 0).tobytes():
+            print(f"{size}: 输出不一致!")
+            sys.exit(1)
+
+        old = best_of(legacy_mask, frame, 0)
+        new = best_of(build_alpha_mask, frame, 0)
+        label = f"{size[0]}x{size[1]}"
+        print(f"{label:>10} {old * 1000:>12.2f} {new * 1000:>10.3f} {old / new:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
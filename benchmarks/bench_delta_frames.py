@@ -0,0 +1,117 @@
+"""增量帧（脏矩形）与整帧切换的对比
+
+先离线统计合成素材中每帧变化区域占整帧的比例，然后在Xvfb中分别以整帧模式和增量模式
+运行一个桌宠（关闭音频），依次播放每个状态，报告每秒复制到显示图像的字节数、
+增量模式下整帧铺满和补丁复制的次数、展开后帧占用的内存和进程常驻内存的增量。GIF解码和精灵图集两种加载方式都会测量。
+
+用法: python benchmarks/bench_delta_frames.py [--duration 2] [--random-motion] [-o result.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tkinter as tk
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+from fixtures import pet_workspace, resident_bytes  # noqa: E402
+from gif_frames import delta_boxes  # noqa: E402
+from main import DesktopPet  # noqa: E402
+from parallel_decode import ParallelDecoder  # noqa: E402
+from pet_assets import ANIMATION_FILES  # noqa: E402
+from sprite_sheet import build_sheet, save_sheet  # noqa: E402
+
+MODES = ("full", "delta")
+
+
+def changed_fraction(frames):
+    """每帧变化区域占整帧面积的平均比例"""
+    if not frames:
+        return 0.0
+    width, height = frames[0].size
+    areas = [(box[2] - box[0]) * (box[3] - box[1]) if box else 0 for box in delta_boxes(frames)]
+    return sum(areas) / (len(areas) * width * height)
+
+
+def delta_copies(pet):
+    """增量帧显示图像上累计的 (整帧铺满次数, 补丁复制次数)，没有使用增量帧时为0"""
+    display = pet.renderer.delta_display
+    return (display.full_copies, display.delta_copies) if display is not None else (0, 0)
+
+
+def run(mode, workdir, cache, sheet_path, seconds_per_state):
+    root = tk.Tk()
+    rss_start = resident_bytes()
+    pet = DesktopPet(root, cache, sheet_path=sheet_path, audio_enabled=False,
+                     delta_frames=mode == "delta", idle_timeout=0, base_path=workdir)
+    root.update()
+
+    # 依次播放每个状态，行为循环不切换状态
+    pet.last_state_change = time.monotonic() + 3600
+    bytes_start = pet.renderer.bytes_moved
+    shown_start = pet.frame_clock.frames_shown
+    calls_start = pet.renderer.total_calls
+    full_start, patch_start = delta_copies(pet)
+    wall_start = time.perf_counter()
+    for state in ANIMATION_FILES:
+        pet.state = state
+        pet.play_animation(state)
+        deadline = time.perf_counter() + seconds_per_state
+        while time.perf_counter() < deadline:
+            root.update()
+            time.sleep(0.001)
+    wall = time.perf_counter() - wall_start
+
+    store = pet.frame_library.frame_store.stats()
+    full_copies, patch_copies = delta_copies(pet)
+    result = {
+        "mode": mode,
+        "source": "sheet" if sheet_path else "gif",
+        "bytes_per_s": round((pet.renderer.bytes_moved - bytes_start) / wall),
+        "frames_per_s": round((pet.frame_clock.frames_shown - shown_start) / wall, 1),
+        "tcl_calls_per_s": round((pet.renderer.total_calls - calls_start) / wall, 1),
+        "full_copies": full_copies - full_start,
+        "delta_copies": patch_copies - patch_start,
+        "expanded_kb": round(store["expanded_bytes"] / 1024, 1),
+        "rss_delta_kb": round((resident_bytes() - rss_start) / 1024, 1),
+    }
+
+    pet.close()
+    pet.frame_library.shutdown(wait=True)
+    root.destroy()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=2.0, help="每个状态播放的秒数")
+    parser.add_argument("--random-motion", action="store_true", help="使用每帧整体变化的素材（增量模式的最坏情况）")
+    parser.add_argument("-o", "--output", default=None)
+    args = parser.parse_args()
+
+    with pet_workspace("bochhi-delta-", scale=0.5, local_motion=not args.random_motion) as (workdir, cache):
+        decoder = ParallelDecoder(1)
+        try:
+            decoded = decoder.decode_many(list(ANIMATION_FILES.values()), (120, 120))
+        finally:
+            decoder.shutdown()
+        animations = {state: decoded[path] for state, path in ANIMATION_FILES.items()}
+        fractions = {state: round(changed_fraction(frames), 3) for state, frames in animations.items()}
+        sheet_path = os.path.join(workdir, "pet_sheet.png")
+        save_sheet(*build_sheet(animations), sheet_path)
+
+        results = [run(mode, workdir, cache, sheet, args.duration) for sheet in (None, sheet_path) for mode in MODES]
+
+    print("每帧变化区域占比: " + ", ".join(f"{state} {fraction:.1%}" for state, fraction in fractions.items()))
+    print(f"{'来源':>6} {'模式':>6} {'字节/秒':>10} {'帧/秒':>7} {'Tcl/秒':>7} {'整帧':>6} {'补丁':>7} {'展开KB':>8} {'RSS增量KB':>10}")
+    for r in results:
+        print(f"{r['source']:>6} {r['mode']:>6} {r['bytes_per_s']:>10} {r['frames_per_s']:>7} "
+              f"{r['tcl_calls_per_s']:>7} {r['full_copies']:>6} {r['delta_copies']:>7} {r['expanded_kb']:>8} {r['rss_delta_kb']:>10}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"changed_fraction": fractions, "runs": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""多只桌宠的扩展性测试
+
+在Xvfb中分别运行 1、10、50 只共享帧库的桌宠，报告每只桌宠增加的常驻内存、
+事件循环的CPU占用和唤醒次数。理想情况下内存每只近似常数、CPU随数量线性增长。
+
+用法: python benchmarks/bench_multi_pet.py [--counts 1 10 50] [--duration 5] [-o result.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tkinter as tk
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+from fixtures import pet_workspace, resident_bytes  # noqa: E402
+from frame_library import FrameLibrary  # noqa: E402
+from event_loop import EventLoop  # noqa: E402
+from main import DesktopPet, create_audio  # noqa: E402
+from pet_assets import ANIMATION_FILES  # noqa: E402
+from pet_manager import PetManager  # noqa: E402
+
+
+def run(count, workdir, cache, duration):
+    root = tk.Tk()
+    root.withdraw()
+    event_loop = EventLoop(root)
+    library = FrameLibrary(root, frame_cache=cache, decode_workers=1, event_loop=event_loop, base_path=workdir)
+    for state in ANIMATION_FILES:
+        library.get_frames(state)
+    root.update()
+    library_rss = resident_bytes()
+
+    manager = PetManager(root, DesktopPet, library, create_audio(event_loop, enabled=False, base_path=workdir),
+                         event_loop)
+    for _ in range(count):
+        manager.add_pet(base_path=workdir)
+    root.update()
+    pets_rss = resident_bytes()
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    ticks_start = event_loop.wakeups
+    while time.perf_counter() - wall_start < duration:
+        root.update()
+        time.sleep(0.001)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    ticks = event_loop.wakeups - ticks_start
+
+    manager.shutdown()
+    root.destroy()
+    return {
+        "pets": count,
+        "rss_per_pet_kb": round((pets_rss - library_rss) / count / 1024, 1),
+        "cpu_percent": round(cpu / wall * 100, 2),
+        "cpu_ms_per_pet_per_s": round(cpu / wall / count * 1000, 3),
+        "wakeups_per_s": round(ticks / wall, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("-o", "--output", default=None)
+    args = parser.parse_args()
+
+    with pet_workspace("bochhi-multi-", scale=0.5) as (workdir, cache):
+        results = [run(count, workdir, cache, args.duration) for count in args.counts]
+
+    print(f"{'桌宠数':>6} {'内存/只(KB)':>12} {'CPU%':>7} {'CPU ms/只/秒':>12} {'唤醒/秒':>8}")
+    for r in results:
+        print(f"{r['pets']:>6} {r['rss_per_pet_kb']:>12} {r['cpu_percent']:>7} "
+              f"{r['cpu_ms_per_pet_per_s']:>12} {r['wakeups_per_s']:>8}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
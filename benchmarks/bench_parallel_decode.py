@@ -0,0 +1,68 @@
+"""多进程GIF预处理的扩展性测试
+
+生成一组较大的合成GIF，分别用 1..N 个进程处理全部帧，报告耗时和加速比。
+用法: python benchmarks/bench_parallel_decode.py [--max-workers N] [--size 640] [--frames 24]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fixtures import make_gif  # noqa: E402
+from gif_frames import decode_gif  # noqa: E402
+from parallel_decode import ParallelDecoder, default_workers  # noqa: E402
+
+
+def worker_counts(max_workers):
+    counts = [1]
+    while counts[-1] * 2 <= max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-workers", type=int, default=default_workers())
+    parser.add_argument("--size", type=int, default=640)
+    parser.add_argument("--frames", type=int, default=24)
+    parser.add_argument("--gifs", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(args.gifs):
+            path = os.path.join(tmp, f"({i + 1}).gif")
+            make_gif(path, (args.size, args.size), args.frames, seed=i)
+            paths.append(path)
+
+        expected = {path: [frame.tobytes() for frame in decode_gif(path)] for path in paths}
+        total_frames = args.gifs * args.frames
+        print(f"{args.gifs} 个GIF, 每个 {args.frames} 帧, {args.size}x{args.size}")
+        print(f"{'进程数':>6} {'耗时(ms)':>10} {'帧/秒':>8} {'加速比':>8}")
+
+        baseline = None
+        for workers in worker_counts(args.max_workers):
+            decoder = ParallelDecoder(workers)
+            # 预热进程池，排除进程启动时间
+            decoder.decode_gif(paths[0])
+            start = time.perf_counter()
+            results = decoder.decode_many(paths)
+            elapsed = time.perf_counter() - start
+            decoder.shutdown()
+
+            for path in paths:
+                if [frame.tobytes() for frame in results[path]] != expected[path]:
+                    print(f"{workers} 进程: {path} 输出与串行处理不一致!")
+                    sys.exit(1)
+
+            baseline = baseline or elapsed
+            print(f"{workers:>6} {elapsed * 1000:>10.1f} {total_frames / elapsed:>8.1f} "
+                  f"{baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""无头环境下的桌宠性能基准
+
+在虚拟X显示（Xvfb）中运行 DesktopPet（关闭音频），用合成GIF素材测量：
+  - 启动到第一帧显示的时间（冷缓存 / 热缓存）
+  - 每个GIF的解码处理耗时（冷缓存 / 热缓存）
+  - update_animation 和 update_behavior 每个tick的耗时
+  - 从合成的 <B1-Motion> 事件到窗口位置实际改变的延迟，以及拖动期间查询屏幕尺寸的次数（应为0）
+  - 窗口面积，以及持续行走和拖动时进程的CPU占用
+结果写成JSON，便于在不同提交之间比较。
+
+用法: python benchmarks/bench_pet.py [-o result.json] [--duration 5] [--scale 1.0]
+没有设置 DISPLAY 时会尝试自动启动 Xvfb。
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import tkinter as tk
+
+from PIL import Image
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+from fixtures import DEFAULT_SPECS, pet_workspace  # noqa: E402
+from main import DesktopPet  # noqa: E402
+from parallel_decode import ParallelDecoder  # noqa: E402
+from pet_assets import ANIMATION_FILES  # noqa: E402
+
+
+def summarize(samples):
+    """耗时样本（秒）的统计，单位毫秒"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50_ms": round(percentile(0.5), 3),
+        "p95_ms": round(percentile(0.95), 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def timed(method, samples):
+    """包装实例方法，记录每次调用的耗时"""
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - start)
+    return wrapper
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_pet(workdir, cache, duration, drag_samples):
+    """启动一个桌宠，运行duration秒并采集各项指标"""
+    result = {}
+    root = tk.Tk()
+    start = time.perf_counter()
+    pet = DesktopPet(root, cache, audio_enabled=False, base_path=workdir)
+    root.update()
+    result["time_to_first_frame_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+    # 替换实例上的回调，事件循环重新登记时也会经过包装
+    animation_ticks, behavior_ticks = [], []
+    pet.update_animation = timed(pet.update_animation, animation_ticks)
+    pet.update_behavior = timed(pet.update_behavior, behavior_ticks)
+
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        root.update()
+        time.sleep(0.001)
+    # 原地播放时没有发出任何Tcl调用的tick占比（帧不变的tick什么都不发送，空闲CPU接近零），在行走和拖动之前取样
+    result["tcl_idle_tick_ratio"] = round(pet.renderer.idle_ratio, 3)
+
+    # 持续行走：每次行为步进都会移动窗口
+    pet.state = "walk"
+    pet.play_animation("walk")
+    pet.last_state_change = time.monotonic() + duration * 10
+    # 行为循环可能正睡到下一次切换状态，立即按新状态重新调度
+    pet.wake()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    while time.perf_counter() - wall_start < duration:
+        root.update()
+        time.sleep(0.001)
+    result["walk_cpu_percent"] = round((time.process_time() - cpu_start)
+                                       / (time.perf_counter() - wall_start) * 100, 2)
+
+    # 合成拖动：每次移动后等待窗口位置实际改变
+    canvas = pet.canvas
+    drag_latencies = []
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    canvas.event_generate("<Button-1>", x=10, y=10, rootx=700, rooty=700)
+    queries_start = pet.renderer.screen_queries
+    for step in range(drag_samples):
+        target = (300 + step * 3, 300 + step * 2)
+        start = time.perf_counter()
+        canvas.event_generate("<B1-Motion>", x=10, y=10, rootx=target[0], rooty=target[1])
+        # 拖动后窗口可能换成 crazy 动画的包围盒，期望位置按事件处理后的值计算
+        expected = pet.clamp_position(target[0] - pet.frame_size[0] // 2, target[1] - pet.frame_size[1] // 2)
+        while pet.renderer.position != expected and time.perf_counter() - start < 1.0:
+            root.update()
+        drag_latencies.append(time.perf_counter() - start)
+    canvas.event_generate("<ButtonRelease-1>", x=10, y=10, rootx=target[0], rooty=target[1])
+    root.update()
+    # 每次移动都会触发 <Configure>，但不应该再查询屏幕尺寸（winfo_screenwidth/height 各一次Tcl调用）
+    result["drag_screen_queries"] = pet.renderer.screen_queries - queries_start
+    result["drag_cpu_percent"] = round((time.process_time() - cpu_start)
+                                       / (time.perf_counter() - wall_start) * 100, 2)
+    result["window_pixels"] = pet.renderer.window_area
+
+    result["update_animation"] = summarize(animation_ticks)
+    result["update_behavior"] = summarize(behavior_ticks)
+    result["drag_latency"] = summarize(drag_latencies)
+    result["frame_clock"] = {"fps": round(pet.frame_clock.fps, 2),
+                             "mean_lateness_ms": round(pet.frame_clock.mean_lateness_ms, 3),
+                             "jitter_ms": round(pet.frame_clock.jitter_ms, 3),
+                             "frames_skipped": pet.frame_clock.frames_skipped}
+    result["tcl_calls_per_tick"] = round(pet.renderer.calls_per_tick, 3)
+    result["frame_store"] = pet.frame_library.frame_store.stats()
+    result["dedup"] = pet.frame_library.dedup_report()
+
+    pet.close()
+    pet.frame_library.shutdown(wait=True)
+    root.destroy()
+    return result
+
+
+def measure_decode(cache, animation_files):
+    """每个GIF经过帧缓存处理的耗时"""
+    decoder = ParallelDecoder(1)
+    timings = {}
+    for state, path in animation_files.items():
+        start = time.perf_counter()
+        frames = cache.load_or_build(path, (120, 120), Image.LANCZOS, builder=decoder.decode_gif)
+        timings[state] = {"frames": len(frames), "ms": round((time.perf_counter() - start) * 1000, 2)}
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DesktopPet 无头性能基准")
+    parser.add_argument("-o", "--output", default=None, help="JSON结果文件（默认输出到标准输出）")
+    parser.add_argument("--duration", type=float, default=5.0, help="每次运行动画循环的秒数")
+    parser.add_argument("--scale", type=float, default=1.0, help="合成GIF尺寸的缩放系数")
+    parser.add_argument("--drag-samples", type=int, default=100, help="合成拖动事件的次数")
+    args = parser.parse_args()
+
+    with pet_workspace("bochhi-bench-", scale=args.scale) as (workdir, cache):
+        report = {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "fixtures": {state: {"edge": max(8, int(edge * args.scale)), "frames": frames}
+                         for state, (edge, frames) in DEFAULT_SPECS.items()},
+            "decode_cold": measure_decode(cache, ANIMATION_FILES),
+            "decode_warm": measure_decode(cache, ANIMATION_FILES),
+        }
+        cache.clear()
+        report["cold_cache"] = run_pet(workdir, cache, args.duration, args.drag_samples)
+        report["warm_cache"] = run_pet(workdir, cache, args.duration, args.drag_samples)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    queries = [report[run]["drag_screen_queries"] for run in ("cold_cache", "warm_cache")]
+    if any(queries):
+        sys.exit(f"拖动期间查询了屏幕尺寸: {queries} 次")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""桌宠包与精灵图集的加载开销对比
+
+用合成素材生成一张精灵图集和若干个桌宠包，分别测量：
+读入整张图集的耗时；打开桌宠包（只解析索引）的耗时；显示第一个状态时从包中读出的字节数和耗时；
+以及在几个桌宠包之间来回切换时，每次切换实际读取的字节数。不需要图形环境。
+
+用法: python benchmarks/bench_pet_pack.py [--packs 3] [--switches 20] [-o result.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fixtures import pet_workspace  # noqa: E402
+from frame_pyramid import BASE_SIZE, level_sizes  # noqa: E402
+from pet_pack import PetPack, build_pack, decode_levels  # noqa: E402
+from sprite_sheet import build_sheet, load_sheet, save_sheet  # noqa: E402
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packs", type=int, default=3, help="安装的桌宠包数量")
+    parser.add_argument("--switches", type=int, default=20, help="在桌宠包之间切换的次数")
+    parser.add_argument("--state", default="sing", help="切换后显示的状态")
+    parser.add_argument("-o", "--output", default=None)
+    args = parser.parse_args()
+
+    with pet_workspace("bochhi-pack-", display=False) as (workdir, _):
+        levels = decode_levels(level_sizes(), workers=1)
+
+        sheet_path = os.path.join(workdir, "pet_sheet.png")
+        save_sheet(*build_sheet(levels[BASE_SIZE]), sheet_path)
+        _, sheet_ms = timed(load_sheet, sheet_path)
+
+        paths = []
+        for number in range(args.packs):
+            path = os.path.join(workdir, "pets", f"pet{number}.petpack")
+            build_pack(path, levels, name=f"pet{number}")
+            paths.append(path)
+
+        pack, open_ms = timed(PetPack, paths[0])
+        _, first_ms = timed(pack.frames, args.state, BASE_SIZE)
+        first_bytes = pack.bytes_read
+        pack.close()
+
+        # 来回切换：每次打开下一个包，只读出要显示的那个状态
+        switch_ms = []
+        switch_bytes = []
+        for number in range(args.switches):
+            start = time.perf_counter()
+            pack = PetPack(paths[number % len(paths)])
+            pack.frames(args.state, BASE_SIZE)
+            switch_ms.append((time.perf_counter() - start) * 1000)
+            switch_bytes.append(pack.bytes_read)
+            pack.close()
+
+        result = {
+            "sheet_kb": round(os.path.getsize(sheet_path) / 1024, 1),
+            "sheet_load_ms": round(sheet_ms, 2),
+            "pack_kb": round(os.path.getsize(paths[0]) / 1024, 1),
+            "pack_open_ms": round(open_ms, 2),
+            "first_state_ms": round(first_ms, 2),
+            "first_state_kb": round(first_bytes / 1024, 1),
+            "switch_ms": round(sum(switch_ms) / len(switch_ms), 2) if switch_ms else 0.0,
+            "switch_kb": round(sum(switch_bytes) / len(switch_bytes) / 1024, 1) if switch_bytes else 0.0,
+        }
+
+    print(f"图集: {result['sheet_kb']}KB（只有 {BASE_SIZE} 像素一级），整张读入 {result['sheet_load_ms']}ms")
+    print(f"桌宠包: {result['pack_kb']}KB（帧金字塔所有级别），打开 {result['pack_open_ms']}ms，"
+          f"显示 {args.state} 读取 {result['first_state_kb']}KB / {result['first_state_ms']}ms")
+    print(f"在 {args.packs} 个桌宠包之间切换 {args.switches} 次: 平均每次 {result['switch_ms']}ms，"
+          f"读取 {result['switch_kb']}KB")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""省电调度的效果测试
+
+在Xvfb中运行一个桌宠（关闭音频），依次测量三种情形下每秒的事件循环唤醒次数和CPU占用：
+  - active：不检测用户空闲，全速运行；
+  - idle：空闲超时设为很短，很快进入低帧率；
+  - hidden：窗口被隐藏（withdraw），动画暂停。
+
+用法: python benchmarks/bench_power.py [--duration 5] [-o result.json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tkinter as tk
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+from fixtures import pet_workspace  # noqa: E402
+from main import DesktopPet  # noqa: E402
+
+SCENARIOS = ("active", "idle", "hidden")
+
+
+def run(scenario, workdir, cache, duration):
+    root = tk.Tk()
+    idle_timeout = 0.5 if scenario == "idle" else 0
+    pet = DesktopPet(root, cache, audio_enabled=False, idle_timeout=idle_timeout, base_path=workdir)
+    root.update()
+    if scenario == "hidden":
+        root.withdraw()
+    # 等待进入目标状态后再开始计数
+    settle = time.perf_counter() + 2.0
+    while time.perf_counter() < settle:
+        root.update()
+        time.sleep(0.001)
+
+    wakeups_start = pet.event_loop.wakeups
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    while time.perf_counter() - wall_start < duration:
+        root.update()
+        time.sleep(0.001)
+    wall = time.perf_counter() - wall_start
+    result = {
+        "scenario": scenario,
+        "mode": pet.power.mode(),
+        "wakeups_per_s": round((pet.event_loop.wakeups - wakeups_start) / wall, 2),
+        "cpu_percent": round((time.process_time() - cpu_start) / wall * 100, 2),
+    }
+
+    pet.close()
+    pet.frame_library.shutdown(wait=True)
+    root.destroy()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("-o", "--output", default=None)
+    args = parser.parse_args()
+
+    with pet_workspace("bochhi-power-", scale=0.5) as (workdir, cache):
+        results = [run(scenario, workdir, cache, args.duration) for scenario in SCENARIOS]
+
+    print(f"{'情形':>8} {'模式':>8} {'唤醒/秒':>8} {'CPU%':>7}")
+    for r in results:
+        print(f"{r['scenario']:>8} {r['mode']:>8} {r['wakeups_per_s']:>8} {r['cpu_percent']:>7}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""基准测试用的合成GIF素材（仓库中不包含真实的GIF资源）和公共的运行环境"""
+import contextlib
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+from frame_cache import FrameCache
+from pet_assets import ANIMATION_FILES
+
+# 各状态的合成素材规格：(边长, 帧数)
+DEFAULT_SPECS = {
+    "walk": (240, 12),
+    "dance": (480, 24),
+    "sing": (360, 16),
+    "crazy": (640, 32),
+}
+
+
+def make_gif(path, size, frame_count, seed, duration=80, local_motion=False):
+    """生成带透明背景和随机色块的调色板GIF
+
+    local_motion 为True时只有第一帧随机铺色块，之后每帧只有一小块区域移动（接近真实桌宠动画），
+    否则每帧都重新随机铺满。
+    """
+    rng = random.Random(seed)
+    palette = [0, 0, 0] + [rng.randrange(256) for _ in range(255 * 3)]
+    frames = []
+    base = None
+    for index in range(frame_count):
+        if local_motion and base is not None:
+            frame = base.copy()
+            edge = max(2, size[0] // 8)
+            x0 = (index * edge // 2) % max(1, size[0] - edge)
+            frame.paste(rng.randrange(1, 256), (x0, size[1] // 2, x0 + edge, size[1] // 2 + edge))
+            frames.append(frame)
+            continue
+        frame = Image.new("P", size, 0)
+        frame.putpalette(palette)
+        for _ in range(12):
+            x0, y0 = rng.randrange(size[0]), rng.randrange(size[1])
+            box = (x0, y0, min(size[0], x0 + size[0] // 3), min(size[1], y0 + size[1] // 3))
+            frame.paste(rng.randrange(1, 256), box)
+        frames.append(frame)
+        base = frame
+    frames[0].save(path, save_all=True, append_images=frames[1:], transparency=0,
+                   duration=duration, loop=0, disposal=2)
+
+
+def make_pet_assets(root_dir, animation_files, specs=None, scale=1.0, local_motion=False):
+    """按 ANIMATION_FILES 的相对路径在 root_dir 下生成全部状态的GIF"""
+    specs = specs or DEFAULT_SPECS
+    for seed, (state, rel_path) in enumerate(sorted(animation_files.items())):
+        edge, frame_count = specs[state]
+        edge = max(8, int(edge * scale))
+        path = os.path.join(root_dir, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        make_gif(path, (edge, edge), frame_count, seed, local_motion=local_motion)
+
+
+def resident_bytes():
+    """当前进程的常驻内存（仅Linux，读取 /proc/self/statm）"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def start_xvfb():
+    """没有可用显示时启动Xvfb，返回进程对象（已有显示时返回None）"""
+    if os.environ.get("DISPLAY"):
+        return None
+    if shutil.which("Xvfb") is None:
+        sys.exit("没有 DISPLAY 且找不到 Xvfb，无法运行基准测试")
+
+    display = ":99"
+    process = subprocess.Popen(["Xvfb", display, "-screen", "0", "1920x1080x24", "-nolisten", "tcp"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ["DISPLAY"] = display
+    time.sleep(1.0)
+    return process
+
+
+@contextlib.contextmanager
+def pet_workspace(prefix="bochhi-bench-", scale=1.0, local_motion=False, display=True):
+    """在临时目录里生成全部状态的合成素材并切换到该目录，需要时启动Xvfb
+
+    产出 (工作目录, 该目录下的帧缓存)；退出时恢复工作目录、删除临时文件并关闭Xvfb。
+    """
+    xvfb = start_xvfb() if display else None
+    workdir = tempfile.mkdtemp(prefix=prefix)
+    old_cwd = os.getcwd()
+    try:
+        make_pet_assets(workdir, ANIMATION_FILES, scale=scale, local_motion=local_motion)
+        os.chdir(workdir)
+        yield workdir, FrameCache(os.path.join(workdir, "cache"))
+    finally:
+        os.chdir(old_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+        if xvfb is not None:
+            xvfb.terminate()
@@ -1,9 +1,19 @@
 import PyInstaller.__main__
+import argparse
 import os
 import shutil
+import statistics
+import subprocess
 import sys
+import time
 import logging
 import glob
+import hashlib
+import json
+
+from frame_pyramid import BASE_SIZE, level_sizes
+from pet_assets import ANIMATION_FILES, DEFAULT_PACK, IMAGE_FILES, PACK_DIR, SOUND_FILES, STREAM_FILES
+from pet_pack import PetPack, build_default_pack
 
 # 配置日志
 logging.basicConfig(
@@ -16,21 +26,93 @@ logging.basicConfig(
 )
 
 
-def validate_resources():
-    """验证所有必需的资源文件是否存在"""
+# 生成桌宠包的代码：抠图和缩放、帧金字塔、并行解码、包格式和资源清单，任何一个变化都要重新生成
+BAKE_MODULES = ('gif_frames.py', 'frame_pyramid.py', 'parallel_decode.py', 'pet_pack.py', 'pet_assets.py')
+
+
+def pack_sources():
+    """桌宠包的全部源文件：各状态的GIF、声音和弹窗图片"""
+    return [path for files in (ANIMATION_FILES, SOUND_FILES, STREAM_FILES, IMAGE_FILES) for path in files.values()]
+
+
+def bake_key(workers=None):
+    """决定能否沿用已有桌宠包的全部输入：源文件和生成代码的哈希、帧金字塔的级别、基准尺寸和进程数"""
+    return {
+        'sources': {path: hash_file(path) for path in pack_sources() if os.path.exists(path)},
+        'code': {path: hash_file(path) for path in BAKE_MODULES},
+        'levels': level_sizes(),
+        'base_size': BASE_SIZE,
+        'workers': workers,
+    }
+
+
+def changed_bake_inputs(old, new):
+    """两次构建之间变化的输入，用于日志"""
+    old = old or {}
+    changed = []
+    for section in ('sources', 'code'):
+        before, after = old.get(section) or {}, new[section]
+        changed += [path for path in sorted(set(before) | set(after)) if before.get(path) != after.get(path)]
+    changed += [name for name in ('levels', 'base_size', 'workers') if old.get(name) != new[name]]
+    return changed
+
+
+def bake_assets(workers=None):
+    """把所有状态的GIF预处理（抠图、缩放到帧金字塔的每一级）后，连同声音和图片打包成一个桌宠包"""
+    start = time.perf_counter()
+    try:
+        index = build_default_pack(DEFAULT_PACK, workers=workers)
+    except (OSError, ValueError) as e:
+        logging.error(f"无法生成桌宠包: {e}")
+        return False
+
+    raw_size = sum(os.path.getsize(path) for path in pack_sources() if os.path.exists(path))
+    logging.info(f"已生成桌宠包 {DEFAULT_PACK}: 尺寸 {', '.join(index['levels'])}, "
+                 f"{os.path.getsize(DEFAULT_PACK) / 1024:.1f}KB (原始资源 {raw_size / 1024:.1f}KB), "
+                 f"耗时 {time.perf_counter() - start:.2f}s")
+    for key, stats in index["dedup"].items():
+        if stats["kept"] < stats["frames"]:
+            logging.info(f"  {key}: 合并重复帧 {stats['frames']} -> {stats['kept']}，"
+                         f"节省 {stats['bytes_saved'] / 1024:.1f}KB")
+    return True
+
+
+def validate_baked_assets():
+    """检查桌宠包能否打开，并且包含所有状态、声音和弹窗图片"""
+    if not os.path.exists(DEFAULT_PACK):
+        logging.error(f"缺少桌宠包: {DEFAULT_PACK}")
+        return False
+    try:
+        pack = PetPack(DEFAULT_PACK)
+    except (OSError, ValueError) as e:
+        logging.error(f"桌宠包无效: {DEFAULT_PACK} ({e})")
+        return False
+
+    valid = True
+    try:
+        for state in ANIMATION_FILES:
+            if state not in pack.states(BASE_SIZE) or not pack.entries(state, BASE_SIZE):
+                logging.error(f"桌宠包中缺少状态: {state}")
+                valid = False
+        for name in list(SOUND_FILES) + list(STREAM_FILES):
+            if pack.sound(name) is None:
+                logging.error(f"桌宠包中缺少声音: {name}")
+                valid = False
+        for name in IMAGE_FILES:
+            if pack.image(name) is None:
+                logging.error(f"桌宠包中缺少图片: {name}")
+                valid = False
+    finally:
+        pack.close()
+    return valid
+
+
+def validate_resources(baked=True):
+    """验证所有必需的资源文件是否存在（预处理模式下检查桌宠包而不是原始文件）"""
     required_resources = {
-        'gifs': [
-            'Bochhi/DeskPets/(1).gif',
-            'Bochhi/DeskPets/(2).gif',
-            'Bochhi/DeskPets/(3).gif',
-            'Bochhi/DeskPets/(4).gif'
-        ],
-        'images': [
-            'images/special.bmp'
-        ],
-        'sounds': [
-            'sounds/Happy_Birthday_Crowd.wav'
-        ],
+        'gifs': [] if baked else list(ANIMATION_FILES.values()),
+        'images': [] if baked else list(IMAGE_FILES.values()),
+        'sounds': [] if baked else list(SOUND_FILES.values()) + list(STREAM_FILES.values()),
         'icons': [
             'icon.ico'
         ]
@@ -38,6 +120,9 @@ def validate_resources():
 
     missing_files = []
 
+    if baked and not validate_baked_assets():
+        missing_files.append(DEFAULT_PACK)
+
     # 检查GIF文件
     for gif in required_resources['gifs']:
         if not os.path.exists(gif):
@@ -84,32 +169,34 @@ def clean_build_artifacts():
                 logging.error(f"清理 {artifact} 失败: {e}")
 
 
-def get_resource_paths():
+def get_resource_paths(baked=True):
     """获取所有需要包含的资源路径"""
     resource_paths = []
 
-    # 主资源目录
-    resource_dir = 'Bochhi/DeskPets'
-    target_dir = 'Bochhi'
-
-    if os.path.exists(resource_dir):
-        resource_paths.append(('Bochhi/DeskPets', 'Bochhi'))
+    if baked:
+        # 只打包一个桌宠包（帧、声音和图片都在里面），原始GIF、图片和声音目录不进入程序包
+        resource_paths.append((DEFAULT_PACK, PACK_DIR))
     else:
-        logging.error(f"资源目录不存在: {resource_dir}")
+        # 主资源目录
+        resource_dir = 'Bochhi/DeskPets'
+        if os.path.exists(resource_dir):
+            resource_paths.append((resource_dir, resource_dir))
+        else:
+            logging.error(f"资源目录不存在: {resource_dir}")
 
-    # 图片目录
-    image_dir = 'images'
-    if os.path.exists(image_dir):
-        resource_paths.append(('images', 'images'))
-    else:
-        logging.warning(f"图片目录不存在: {image_dir}")
+        # 图片目录
+        image_dir = 'images'
+        if os.path.exists(image_dir):
+            resource_paths.append(('images', 'images'))
+        else:
+            logging.warning(f"图片目录不存在: {image_dir}")
 
-    # 声音目录
-    sounds_dir = 'sounds'
-    if os.path.exists(sounds_dir):
-        resource_paths.append(('sounds', 'sounds'))
-    else:
-        logging.warning(f"声音目录不存在: {sounds_dir}")
+        # 声音目录
+        sounds_dir = 'sounds'
+        if os.path.exists(sounds_dir):
+            resource_paths.append(('sounds', 'sounds'))
+        else:
+            logging.warning(f"声音目录不存在: {sounds_dir}")
 
     # 添加所有其他必要的文件
     additional_files = [
@@ -126,45 +213,188 @@ def get_resource_paths():
     return resource_paths
 
 
+# 上一次构建的指纹：代码、资源和PyInstaller参数的哈希，以及PyInstaller打包耗时
+FINGERPRINT_FILE = os.path.join('build', 'fingerprint.json')
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint_code():
+    """main.py 及其导入的本地模块（根目录下所有 .py）的哈希"""
+    return {path: hash_file(path) for path in sorted(glob.glob('*.py'))}
+
+
+def data_sources(resource_paths):
+    """程序包内的相对路径 -> 源文件路径"""
+    sources = {}
+    for source, target in resource_paths:
+        if os.path.isfile(source):
+            sources[os.path.join(target, os.path.basename(source)).replace(os.sep, '/')] = source
+            continue
+        for root, _, names in os.walk(source):
+            for name in names:
+                path = os.path.join(root, name)
+                sources[os.path.join(target, os.path.relpath(path, source)).replace(os.sep, '/')] = path
+    return sources
+
+
+def fingerprint_data(resource_paths):
+    """资源文件的哈希，键为它在程序包内的相对路径"""
+    return {dest: hash_file(path) for dest, path in data_sources(resource_paths).items()}
+
+
+def load_fingerprint():
+    try:
+        with open(FINGERPRINT_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_fingerprint(fingerprint):
+    os.makedirs(os.path.dirname(FINGERPRINT_FILE), exist_ok=True)
+    with open(FINGERPRINT_FILE, 'w', encoding='utf-8') as f:
+        json.dump(fingerprint, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+
+def bundle_data_dir():
+    """onedir 程序包中存放资源的目录（PyInstaller 6 起位于 _internal 下）"""
+    bundle_dir = os.path.join('dist', 'DesktopPet')
+    internal = os.path.join(bundle_dir, '_internal')
+    return internal if os.path.isdir(internal) else bundle_dir
+
+
+def update_bundle_data(sources, changed, removed):
+    """只把变化的资源复制进已有的 onedir 程序包，并删除不再需要的资源"""
+    data_dir = bundle_data_dir()
+    for dest in changed:
+        target = os.path.join(data_dir, dest)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(sources[dest], target)
+        logging.info(f"更新资源: {dest}")
+    for dest in removed:
+        try:
+            os.remove(os.path.join(data_dir, dest))
+            logging.info(f"删除资源: {dest}")
+        except OSError:
+            pass
+
+
+def executable_path(layout):
+    """打包产物中可执行文件的路径"""
+    name = 'DesktopPet.exe' if sys.platform == 'win32' else 'DesktopPet'
+    if layout == 'onedir':
+        return os.path.join('dist', 'DesktopPet', name)
+    return os.path.join('dist', name)
+
+
+def bundle_size(layout):
+    """程序包的总字节数（onedir 为整个目录）"""
+    if layout == 'onefile':
+        return os.path.getsize(executable_path(layout))
+    total = 0
+    for root, _, files in os.walk(os.path.join('dist', 'DesktopPet')):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def measure_cold_start(layout, runs=3, timeout=120):
+    """启动打包好的程序直到显示第一帧，返回每次的耗时（秒）；无法运行时返回空列表"""
+    exe = executable_path(layout)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        try:
+            result = subprocess.run([exe, '--startup-probe', '--mute'], timeout=timeout,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logging.warning(f"无法测量冷启动时间: {e}")
+            return []
+        if result.returncode != 0:
+            logging.warning(f"启动测试失败，退出码 {result.returncode}（无图形环境时属正常）")
+            return []
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="打包桌面宠物")
+    parser.add_argument('--layout', choices=['onedir', 'onefile'], default='onedir',
+                        help="onedir 启动时不需要解压，onefile 为单个文件（默认 onedir）")
+    parser.add_argument('--raw', action='store_true', help="打包原始GIF、图片和声音目录，不生成桌宠包")
+    parser.add_argument('--full', action='store_true',
+                        help="完整重建：清理构建产物并让PyInstaller从头分析（默认增量构建）")
+    parser.add_argument('--workers', type=int, default=None, help="预处理GIF的进程数")
+    parser.add_argument('--startup-runs', type=int, default=3, help="冷启动测量次数，0为不测量")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+    baked = not args.raw
+    previous = None if args.full else load_fingerprint()
+    total_start = time.perf_counter()
+
     logging.info("=" * 50)
     logging.info("开始桌面宠物打包过程")
     logging.info("=" * 50)
 
-    # 步骤1: 验证资源文件
+    # 步骤1: 预处理动画帧，生成桌宠包
+    bake_inputs = {}
+    if baked:
+        bake_inputs = bake_key(args.workers)
+        changed = changed_bake_inputs((previous or {}).get('bake_inputs'), bake_inputs)
+        if previous and not changed and validate_baked_assets():
+            logging.info("预处理缓存命中: 资源和生成代码未变化，沿用已有桌宠包")
+        else:
+            if previous and changed:
+                logging.info(f"预处理输入有变化: {', '.join(changed)}")
+            logging.info("生成桌宠包...")
+            if not bake_assets(args.workers):
+                logging.critical("预处理失败，打包中止！")
+                sys.exit(1)
+
+    # 步骤2: 验证资源文件
     logging.info("验证资源文件...")
-    if not validate_resources():
+    if not validate_resources(baked):
         logging.critical("资源验证失败，打包中止！")
         sys.exit(1)
 
-    # 步骤2: 清理之前的构建产物
-    logging.info("清理构建产物...")
-    clean_build_artifacts()
+    # 步骤3: 完整重建时清理之前的构建产物，增量构建保留 build/ 中PyInstaller的分析缓存
+    if args.full:
+        logging.info("清理构建产物...")
+        clean_build_artifacts()
 
-    # 步骤3: 准备打包参数
+    # 步骤4: 准备打包参数
     logging.info("准备打包参数...")
     params = [
         'main.py',  # 主程序文件
-        '--onefile',  # 打包为单个exe
+        f'--{args.layout}',  # onedir 免去每次启动解压到临时目录
         '--windowed',  # 不显示控制台窗口
         '--name=DesktopPet',  # 生成的exe名称
-        '--clean',  # 清理临时文件
         '--noconfirm',  # 不询问确认
         '--log-level=WARN'  # 减少PyInstaller日志
     ]
 
-    # 步骤4: 添加资源文件
-    resource_paths = get_resource_paths()
+    # 步骤5: 添加资源文件（程序包内只保存一份，运行时以程序包目录为工作目录）
+    resource_paths = get_resource_paths(baked)
     for source, target in resource_paths:
         params.extend(['--add-data', f'{source}{os.pathsep}{target}'])
         logging.info(f"添加资源: {source} -> {target}")
 
-    # 步骤5: 添加图标
+    # 步骤6: 添加图标
     if os.path.exists('icon.ico'):
         params.extend(['--icon', 'icon.ico'])
         logging.info("添加应用程序图标")
 
-    # 步骤6: 添加隐藏导入（如果需要）
+    # 步骤7: 添加隐藏导入（如果需要）
     hidden_imports = [
         'PIL',
         'PIL.Image',
@@ -175,47 +405,58 @@ def main():
     for imp in hidden_imports:
         params.extend(['--hidden-import', imp])
 
-    # 步骤7: 执行打包
-    logging.info("开始打包过程...")
-    logging.info(f"PyInstaller 参数: {' '.join(params)}")
-
-    try:
-        PyInstaller.__main__.run(params)
-        logging.info("打包成功完成!")
-    except Exception as e:
-        logging.critical(f"打包过程中出错: {e}")
-        sys.exit(1)
-
-    # 步骤8: 后处理
+    # 步骤8: 比较指纹，代码和参数都没变时复用上次的程序包
+    fingerprint = {
+        'params': params,
+        'code': fingerprint_code(),
+        'data': fingerprint_data(resource_paths),
+        'bake_inputs': bake_inputs,
+    }
+    changed, removed = None, None
+    if previous and os.path.exists(executable_path(args.layout)):
+        if previous.get('params') == params and previous.get('code') == fingerprint['code']:
+            old_data = previous.get('data', {})
+            changed = [dest for dest, digest in fingerprint['data'].items() if old_data.get(dest) != digest]
+            removed = [dest for dest in old_data if dest not in fingerprint['data']]
+        else:
+            logging.info("构建缓存未命中: 代码或打包参数已变化")
+    elif not args.full:
+        logging.info("构建缓存未命中: 没有上一次的构建")
+
+    build_start = time.perf_counter()
+    last_build_seconds = (previous or {}).get('build_seconds', 0)
+    if changed is not None and not changed and not removed:
+        logging.info("构建缓存命中: 代码、资源和参数均未变化，跳过PyInstaller")
+        fingerprint['build_seconds'] = last_build_seconds
+    elif changed is not None and args.layout == 'onedir':
+        logging.info(f"构建缓存命中: 只有 {len(changed) + len(removed)} 个资源变化，直接更新程序包")
+        update_bundle_data(data_sources(resource_paths), changed, removed)
+        fingerprint['build_seconds'] = last_build_seconds
+    else:
+        # onefile 的资源嵌在可执行文件里，资源变化也要重新打包（仍复用分析缓存）
+        run_params = params + ['--clean'] if args.full else params
+        logging.info("开始打包过程...")
+        logging.info(f"PyInstaller 参数: {' '.join(run_params)}")
+        try:
+            PyInstaller.__main__.run(run_params)
+            logging.info(f"打包成功完成! 耗时 {time.perf_counter() - build_start:.1f}s")
+        except Exception as e:
+            logging.critical(f"打包过程中出错: {e}")
+            sys.exit(1)
+        fingerprint['build_seconds'] = time.perf_counter() - build_start
+        last_build_seconds = 0
+
+    if last_build_seconds:
+        saved = last_build_seconds - (time.perf_counter() - build_start)
+        logging.info(f"相比上次PyInstaller打包节省约 {max(0.0, saved):.1f}s")
+    save_fingerprint(fingerprint)
+
+    # 步骤9: 后处理
     logging.info("执行后处理...")
 
-    # 复制额外的文件到dist目录
-    dist_dir = 'dist'
+    # 复制配置文件到可执行文件旁边，方便用户修改
+    dist_dir = os.path.dirname(executable_path(args.layout))
     if os.path.exists(dist_dir):
-        # 复制资源目录
-        if os.path.exists('Bochhi'):
-            try:
-                shutil.copytree('Bochhi', os.path.join(dist_dir, 'Bochhi'))
-                logging.info("复制 Bochhi 目录到 dist")
-            except Exception as e:
-                logging.error(f"复制 Bochhi 目录失败: {e}")
-
-        # 复制图片目录
-        if os.path.exists('images'):
-            try:
-                shutil.copytree('images', os.path.join(dist_dir, 'images'))
-                logging.info("复制 images 目录到 dist")
-            except Exception as e:
-                logging.error(f"复制 images 目录失败: {e}")
-        # 复制声音目录
-        if os.path.exists('sounds'):
-            try:
-                shutil.copytree('sounds', os.path.join(dist_dir, 'sounds'))
-                logging.info("复制 sounds 目录到 dist")
-            except Exception as e:
-                logging.error(f"复制 sounds 目录失败: {e}")
-
-        # 创建配置文件
         config_files = ['image_config.json', 'music_config.json']
         for config in config_files:
             if os.path.exists(config):
@@ -225,16 +466,24 @@ def main():
                 except Exception as e:
                     logging.error(f"复制 {config} 失败: {e}")
 
+    # 步骤10: 报告程序包大小和冷启动时间
+    logging.info(f"程序包大小 ({args.layout}): {bundle_size(args.layout) / (1024 * 1024):.1f}MB")
+    if args.startup_runs > 0:
+        timings = measure_cold_start(args.layout, args.startup_runs)
+        if timings:
+            logging.info(f"冷启动时间: 中位数 {statistics.median(timings) * 1000:.0f}ms, "
+                         f"最快 {min(timings) * 1000:.0f}ms ({len(timings)} 次)")
+
+    logging.info(f"总耗时 {time.perf_counter() - total_start:.1f}s")
     logging.info("=" * 50)
     logging.info("打包过程完成!")
     logging.info("=" * 50)
-    print("\n打包完成! 可执行文件位于 dist 文件夹")
-    print("请确保以下目录与 DesktopPet.exe 放在同一目录下:")
-    print("  - Bochhi/ (包含所有GIF资源)")
-    print("  - images/ (包含特殊图片)")
-    print("  - sounds/ (包含声音文件)")
-    print("  - 配置文件 (如 image_config.json)")
+    print(f"\n打包完成! 可执行文件位于 {dist_dir}")
+    if baked:
+        print(f"资源已打包为 {DEFAULT_PACK}，无需再复制 Bochhi/、images/、sounds/ 目录")
+    else:
+        print("资源已打包在程序内，无需再复制 Bochhi/、images/、sounds/ 目录")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
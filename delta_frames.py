@@ -0,0 +1,106 @@
+"""增量帧（脏矩形）
+
+连续两帧之间通常只有一小块区域变化。增量模式下一个状态只保存第0帧的完整图像（关键帧）
+和之后每帧相对前一帧变化区域的小图（补丁），每只桌宠只有一个显示用的PhotoImage，
+每个tick只把变化的矩形复制上去。切换动画时从关键帧重新铺满整帧；
+跳帧时沿播放顺序补上中间的补丁，或者从关键帧重新开始，取复制像素较少的一种。
+"""
+import tkinter as tk
+
+from PIL import ImageTk
+
+from gif_frames import delta_boxes
+
+
+class DeltaFrame:
+    """增量动画中的一帧：只记录在哪个动画中的序号"""
+    __slots__ = ("animation", "index")
+
+    def __init__(self, animation, index):
+        self.animation = animation
+        self.index = index
+
+    @property
+    def size(self):
+        return self.animation.size
+
+
+class DeltaAnimation:
+    """一个状态的关键帧和补丁（Tk端）"""
+
+    def __init__(self, images, master=None):
+        self.size = images[0].size
+        self.keyframe = ImageTk.PhotoImage(images[0], master=master)
+        # 每帧的 (变化区域, 该区域的PhotoImage)；与前一帧完全相同时为 (None, None)
+        self.patches = []
+        for image, box in zip(images, delta_boxes(images)):
+            patch = ImageTk.PhotoImage(image.crop(box), master=master) if box else None
+            self.patches.append((box, patch))
+        self.frames = [DeltaFrame(self, index) for index in range(len(images))]
+
+    @property
+    def nbytes(self):
+        """关键帧和补丁展开后的RGBA字节数"""
+        width, height = self.size
+        total = width * height * 4
+        for box, _ in self.patches[1:]:
+            if box:
+                total += (box[2] - box[0]) * (box[3] - box[1]) * 4
+        return total
+
+    def patch_area(self, index):
+        box = self.patches[index][0]
+        return (box[2] - box[0]) * (box[3] - box[1]) if box else 0
+
+
+class DeltaDisplay:
+    """一只桌宠的显示图像，记录上面当前是哪个动画的哪一帧"""
+
+    def __init__(self, master):
+        self.photo = tk.PhotoImage(master=master)
+        self.animation = None
+        self.index = None
+        self.full_copies = 0
+        self.delta_copies = 0
+
+    def show(self, frame):
+        """把显示图像更新为 frame，返回 (Tcl调用数, 复制的像素数)"""
+        animation, index = frame.animation, frame.index
+        count = len(animation.patches)
+        if animation is self.animation:
+            if index == self.index:
+                return 0, 0
+            # 沿播放顺序补上从当前帧到目标帧之间的所有补丁
+            path = [(self.index + step) % count for step in range(1, (index - self.index) % count + 1)]
+        else:
+            path = None
+
+        # 动画切换，或者从关键帧重新开始复制得更少时，先铺满整帧
+        width, height = animation.size
+        from_key = list(range(1, index + 1))
+        if path is None or len(path) > 1 and (sum(animation.patch_area(i) for i in path)
+                            > width * height + sum(animation.patch_area(i) for i in from_key)):
+            calls, pixels = 1, width * height
+            if animation is not self.animation:
+                self.photo.configure(width=width, height=height)
+                calls += 1
+            self._copy(animation.keyframe, 0, 0)
+            self.full_copies += 1
+            path = from_key
+        else:
+            calls, pixels = 0, 0
+
+        for i in path:
+            box, patch = animation.patches[i]
+            if patch is None:
+                continue
+            self._copy(patch, box[0], box[1])
+            self.delta_copies += 1
+            calls += 1
+            pixels += animation.patch_area(i)
+
+        self.animation, self.index = animation, index
+        return calls, pixels
+
+    def _copy(self, source, x, y):
+        self.photo.tk.call(self.photo, "copy", source, "-to", x, y, "-compositingrule", "set")
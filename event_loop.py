@@ -0,0 +1,238 @@
+"""单定时器事件循环
+
+所有周期性和一次性的工作（动画帧、行为步进、窗口移动合并、弹窗自动关闭、限时播放……）
+都登记到同一个按单调时钟排序的优先队列里，Tk上始终只挂一个 after() 定时器，对准最早的截止时间。
+一次唤醒时，所有已经到期的任务在同一个Tk回调里按 (截止时间, 登记顺序) 依次执行（不会提前执行还没到期的任务，
+否则动画tick会算出同一帧、再登记一次，反而多一次唤醒）；多只桌宠的周期任务靠 aligned() 对准同一时刻来合并。
+执行顺序是确定的：测试时可以传入假时钟，直接调用 run_due()。
+
+后台线程（解码、缩放、音频加载）用 call_soon_threadsafe() 把结果交回Tk线程，
+由一个虚拟事件唤醒Tk，不需要轮询。接口尽量与asyncio的事件循环同名（call_later / call_at / time ...）。
+"""
+import heapq
+import itertools
+import math
+import sys
+import threading
+import time
+import tkinter as tk
+from collections import deque
+
+# 后台线程唤醒Tk线程用的虚拟事件
+WAKE_EVENT = "<<EventLoopWake>>"
+# 队列中已取消的任务超过一半（且队列至少这么长）时整理一次
+COMPACT_SIZE = 64
+
+
+class Timer:
+    """登记的任务，用法与 asyncio.TimerHandle 相同"""
+    __slots__ = ("due", "seq", "callback", "args", "loop")
+
+    def __init__(self, due, seq, callback, args, loop):
+        self.due = due
+        self.seq = seq
+        self.callback = callback
+        self.args = args
+        self.loop = loop
+
+    def __lt__(self, other):
+        return (self.due, self.seq) < (other.due, other.seq)
+
+    def when(self):
+        return self.due
+
+    def cancelled(self):
+        return self.callback is None
+
+    def cancel(self):
+        if self.callback is not None:
+            self.callback = None
+            self.args = ()
+            self.loop.cancelled_count += 1
+
+
+class EventLoop:
+    def __init__(self, root, clock=time.monotonic, window_seconds=10):
+        self.root = root
+        self.clock = clock
+        self.queue = []  # Timer 的最小堆
+        self.sequence = itertools.count()
+        self.cancelled_count = 0
+        self.running = False
+        self.closed = False
+        # 唯一的Tk定时器及其对准的截止时间
+        self.timer_job = None
+        self.timer_due = None
+        # 执行任务后调用 observer(回调名, 迟到秒数)，用于性能埋点
+        self.observer = None
+
+        # 其他线程交来的 (回调, 参数)
+        self.thread_id = threading.get_ident()
+        self.posted = deque()
+        self.notify = threading.Event()
+        self.notifier = None
+        root.bind(WAKE_EVENT, self.drain_posted, add="+")
+
+        # 最近 window_seconds 秒内的唤醒时间
+        self.window_seconds = window_seconds
+        self.wakeup_times = deque()
+        self.wakeups = 0
+        self.tasks_run = 0
+
+    def time(self):
+        return self.clock()
+
+    def call_at(self, when, callback, *args):
+        """在单调时钟的 when 时刻执行 callback(*args)，返回可以取消的 Timer"""
+        if len(self.queue) >= COMPACT_SIZE and self.cancelled_count * 2 > len(self.queue):
+            self.queue = [timer for timer in self.queue if not timer.cancelled()]
+            heapq.heapify(self.queue)
+            self.cancelled_count = 0
+        timer = Timer(when, next(self.sequence), callback, args, self)
+        heapq.heappush(self.queue, timer)
+        self.arm()
+        return timer
+
+    def call_later(self, delay, callback, *args):
+        """delay 秒后执行"""
+        return self.call_at(self.clock() + delay, callback, *args)
+
+    def call_soon(self, callback, *args):
+        return self.call_at(self.clock(), callback, *args)
+
+    def aligned(self, delay, grid):
+        """约 delay 秒后、落在 grid 秒整数倍上的时刻；多只桌宠的周期任务因此在同一次唤醒中执行"""
+        now = self.clock()
+        return max(now, math.floor((now + delay) / grid + 0.5) * grid)
+
+    @staticmethod
+    def cancel(timer):
+        if timer is not None:
+            timer.cancel()
+
+    def arm(self):
+        """让唯一的Tk定时器对准队首任务的截止时间"""
+        if self.running or self.closed:
+            return
+        while self.queue and self.queue[0].cancelled():
+            heapq.heappop(self.queue)
+            self.cancelled_count -= 1
+        if not self.queue:
+            return
+        due = self.queue[0].due
+        if self.timer_job is not None:
+            if self.timer_due <= due:
+                return
+            self.root.after_cancel(self.timer_job)
+        self.timer_due = due
+        self.timer_job = self.root.after(max(0, math.ceil((due - self.clock()) * 1000)), self.run_due)
+
+    def run_due(self, now=None):
+        """Tk定时器回调：按顺序执行所有到期的任务，然后对准下一个截止时间，返回执行的任务数
+
+        本次唤醒中新登记的任务留到下一次，即使它们已经到期，避免任务反复登记自己造成死循环。
+        """
+        self.timer_job = None
+        self.timer_due = None
+        self.drain_posted()
+        now = self.clock() if now is None else now
+        limit = next(self.sequence)
+        deferred = []
+        count = 0
+        self.running = True
+        try:
+            while self.queue and self.queue[0].due <= now:
+                timer = heapq.heappop(self.queue)
+                if timer.cancelled():
+                    self.cancelled_count -= 1
+                    continue
+                if timer.seq > limit:
+                    deferred.append(timer)
+                    continue
+                callback, args = timer.callback, timer.args
+                # 执行过的任务视为已完成，之后再取消不影响统计
+                timer.callback = None
+                count += 1
+                if self.observer is not None:
+                    self.observer(getattr(callback, "__name__", "callback"), now - timer.due)
+                self.invoke(callback, args)
+        finally:
+            self.running = False
+            for timer in deferred:
+                heapq.heappush(self.queue, timer)
+        if count:
+            self.count_wakeup(now)
+            self.tasks_run += count
+        self.arm()
+        return count
+
+    def invoke(self, callback, args):
+        """执行一个回调；出错时像Tk回调一样报告，不影响同一批的其他任务"""
+        try:
+            callback(*args)
+        except Exception:
+            self.root.report_callback_exception(*sys.exc_info())
+
+    def call_soon_threadsafe(self, callback, *args):
+        """任意线程：尽快在Tk线程上执行 callback(*args)"""
+        if self.closed:
+            return
+        if threading.get_ident() == self.thread_id:
+            self.call_soon(callback, *args)
+            return
+        self.posted.append((callback, args))
+        if self.notifier is None:
+            self.notifier = threading.Thread(target=self.notify_loop, name="event-loop-notify", daemon=True)
+            self.notifier.start()
+        self.notify.set()
+
+    def notify_loop(self):
+        """通知线程：用虚拟事件唤醒Tk线程
+
+        tkinter的跨线程调用会等待Tk线程处理，放在单独的线程里，后台工作线程永远不会因此阻塞。
+        """
+        while True:
+            self.notify.wait()
+            self.notify.clear()
+            if self.closed:
+                return
+            try:
+                self.root.event_generate(WAKE_EVENT, when="tail")
+            except RuntimeError:
+                # 没有运行 mainloop（例如手动调用 update() 的测试），留给下一次定时器唤醒处理
+                continue
+            except tk.TclError:
+                return
+
+    def drain_posted(self, event=None):
+        """Tk线程：执行其他线程交来的回调"""
+        while self.posted:
+            callback, args = self.posted.popleft()
+            self.invoke(callback, args)
+
+    def count_wakeup(self, now):
+        self.wakeups += 1
+        self.wakeup_times.append(now)
+        while self.wakeup_times and now - self.wakeup_times[0] > self.window_seconds:
+            self.wakeup_times.popleft()
+
+    @property
+    def wakeups_per_second(self):
+        """最近一段时间内每秒的定时器唤醒次数（N次唤醒之间有N-1个间隔）"""
+        if len(self.wakeup_times) < 2:
+            return 0.0
+        span = self.wakeup_times[-1] - self.wakeup_times[0]
+        return (len(self.wakeup_times) - 1) / max(span, 1e-6)
+
+    def close(self):
+        """取消所有任务并停止后台线程"""
+        self.closed = True
+        if self.timer_job is not None:
+            try:
+                self.root.after_cancel(self.timer_job)
+            except tk.TclError:
+                pass
+            self.timer_job = None
+        self.queue.clear()
+        self.posted.clear()
+        self.notify.set()
@@ -0,0 +1,231 @@
+"""已处理动画帧的磁盘缓存
+
+缓存文件按内容寻址：键由源文件哈希、目标尺寸和缩放滤镜组成。
+文件格式为定长头部、帧时长表加连续的RGBA原始数据，可直接顺序读取或内存映射：
+
+    magic(4s) version(H) count(I) width(I) height(I) | duration(I) * count | frame0 | frame1 | ...
+"""
+import hashlib
+import os
+import struct
+
+from PIL import Image
+
+from gif_frames import decode_gif, frame_duration
+
+CACHE_MAGIC = b"BPFC"
+CACHE_VERSION = 2
+_HEADER = struct.Struct("<4sHIII")
+CACHE_SUFFIX = ".frames"
+
+# 默认缓存上限 256MB
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def default_cache_dir():
+    """默认缓存目录（Windows 下位于 LOCALAPPDATA，其他系统位于 ~/.cache）"""
+    root = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(root, "BochhiDeskPets", "frames")
+
+
+def file_digest(path):
+    """计算源文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FrameCache:
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, extra_dirs=()):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        # 只读的附加目录（例如构建时预先生成的帧），读取时在缓存目录之后查找
+        self.extra_dirs = [d for d in extra_dirs if d]
+        self.hits = 0
+        self.misses = 0
+
+    def cache_key(self, path, target_size, resample):
+        """缓存键：源文件哈希 + 目标尺寸 + 缩放滤镜"""
+        source_hash = file_digest(path)
+        return f"{source_hash[:32]}-{target_size[0]}x{target_size[1]}-r{int(resample)}"
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, key + CACHE_SUFFIX)
+
+    def find_entry(self, key):
+        """返回存在该条目的路径（先找缓存目录，再找附加目录），都没有时返回缓存目录中的路径"""
+        entry = self.entry_path(key)
+        if os.path.exists(entry):
+            return entry
+        for directory in self.extra_dirs:
+            candidate = os.path.join(directory, key + CACHE_SUFFIX)
+            if os.path.exists(candidate):
+                return candidate
+        return entry
+
+    def load_or_build(self, path, target_size=(120, 120), resample=Image.LANCZOS, builder=decode_gif):
+        """优先从缓存读取帧，源文件变化或缓存损坏时用builder重新处理并写回"""
+        key = self.cache_key(path, target_size, resample)
+        frames = self.load(key)
+        if frames is not None:
+            self.hits += 1
+            return frames
+
+        self.misses += 1
+        frames = builder(path, target_size, resample)
+        self.store(key, frames)
+        return frames
+
+    def lookup(self, path, target_size=(120, 120), resample=Image.LANCZOS):
+        """只读缓存：命中时返回帧，未命中或源文件不可读时返回None，不做任何处理"""
+        try:
+            key = self.cache_key(path, target_size, resample)
+        except OSError:
+            return None
+        frames = self.load(key)
+        if frames is not None:
+            self.hits += 1
+        return frames
+
+    def load(self, key):
+        """读取缓存条目，不存在或格式不符时返回None"""
+        entry = self.find_entry(key)
+        try:
+            with open(entry, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        if len(data) < _HEADER.size:
+            return None
+        magic, version, count, width, height = _HEADER.unpack_from(data)
+        frame_bytes = width * height * 4
+        if (magic != CACHE_MAGIC or version != CACHE_VERSION
+                or len(data) != _HEADER.size + count * (4 + frame_bytes)):
+            return None
+
+        durations = struct.unpack_from(f"<{count}I", data, _HEADER.size)
+        frames = []
+        offset = _HEADER.size + count * 4
+        for duration in durations:
+            frame = Image.frombuffer("RGBA", (width, height), data[offset:offset + frame_bytes],
+                                     "raw", "RGBA", 0, 1)
+            frame.info["duration"] = duration
+            frames.append(frame)
+            offset += frame_bytes
+
+        # 更新修改时间，供LRU淘汰使用
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return frames
+
+    def store(self, key, frames):
+        """写入缓存条目（先写临时文件再替换，避免半写入的文件）"""
+        if not frames:
+            return
+        width, height = frames[0].size
+        if any(frame.size != (width, height) for frame in frames):
+            return
+
+        entry = self.entry_path(key)
+        tmp_path = entry + ".tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, len(frames), width, height))
+                f.write(struct.pack(f"<{len(frames)}I", *(frame_duration(frame) for frame in frames)))
+                for frame in frames:
+                    f.write(frame.convert("RGBA").tobytes())
+            os.replace(tmp_path, entry)
+        except OSError as e:
+            print(f"写入帧缓存失败: {e}")
+            return
+
+        self.evict()
+
+    def warm(self, paths, decoder, target_size=(120, 120), resample=Image.LANCZOS):
+        """确保一组GIF都已缓存，未命中的交给decoder一起并行处理
+
+        返回 {路径: 缓存键}，无法读取的源文件不在结果中。
+        """
+        keys = {}
+        missing = []
+        for path in paths:
+            try:
+                keys[path] = self.cache_key(path, target_size, resample)
+            except OSError as e:
+                print(f"无法读取 {path}: {e}")
+                continue
+            if not os.path.exists(self.find_entry(keys[path])):
+                missing.append(path)
+
+        if missing:
+            results = decoder.decode_many(missing, target_size, resample)
+            for path, frames in results.items():
+                self.store(keys[path], frames)
+        return keys
+
+    def retain(self, keys):
+        """删除缓存目录中不在keys里的条目，返回删除的数量"""
+        wanted = {key + CACHE_SUFFIX for key in keys}
+        removed = 0
+        for _, _, entry in self.entries():
+            if os.path.basename(entry) not in wanted:
+                try:
+                    os.remove(entry)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def entries(self):
+        """返回 (修改时间, 大小, 路径) 列表，按最近使用时间从旧到新排序"""
+        result = []
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return result
+
+        for name in names:
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            entry = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(entry)
+            except OSError:
+                continue
+            result.append((stat.st_mtime, stat.st_size, entry))
+        result.sort()
+        return result
+
+    def total_bytes(self, entries=None):
+        """缓存条目的总字节数，entries 为已经列出的 entries() 结果时不再重新扫描目录"""
+        return sum(size for _, size, _ in (self.entries() if entries is None else entries))
+
+    def evict(self):
+        """超出容量上限时按最近最少使用顺序删除条目"""
+        entries = self.entries()
+        total = self.total_bytes(entries)
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(entry)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        """删除全部缓存条目，返回删除的数量"""
+        removed = 0
+        for _, _, entry in self.entries():
+            try:
+                os.remove(entry)
+                removed += 1
+            except OSError:
+                pass
+        return removed
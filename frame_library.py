@@ -0,0 +1,296 @@
+"""动画帧库
+
+负责把各状态的GIF（或精灵图集）变成可以直接显示的帧：磁盘缓存、多进程预处理、
+后台解码和带内存预算的压缩存储都在这里。一个进程里的所有桌宠共享同一个帧库，
+引用的是同一批PhotoImage，不会为每只桌宠复制一份。
+帧放入帧库时合并连续的重复帧（时长相加，可选按阈值合并近似帧），统计见 dedup_stats。
+增量模式（delta_frames=True）下帧以关键帧加脏矩形补丁的形式展开，见 delta_frames.py。
+使用桌宠包（pet_pack.py）时只登记包的索引，每个状态的帧在第一次显示时才从映射的文件中读出；
+运行时可以用 use_pack 换成另一个包。
+
+桌宠大小可以在运行时切换：先显示帧金字塔中最接近的一级，
+准确尺寸的帧在后台线程生成，完成后经事件循环交回Tk线程（不轮询），generation 加一，桌宠据此换上新帧。
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageSequence
+
+from event_loop import EventLoop
+from frame_cache import FrameCache
+from frame_pyramid import frame_size, level_sizes, nearest_level, resize_frames
+from frame_store import FrameStore, DEFAULT_BUDGET
+from gif_frames import alpha_bounds, frame_duration, merge_duplicate_frames
+from parallel_decode import ParallelDecoder
+from pet_pack import PackedAnimation
+from pet_assets import ANIMATION_FILES
+from sprite_sheet import TkSpriteSheet, load_sheet
+
+
+class FrameLibrary:
+    def __init__(self, master, frame_cache=None, decode_workers=None, sheet_path=None,
+                 frame_budget=DEFAULT_BUDGET, first_state="sing", scale=1.0, event_loop=None,
+                 delta_frames=False, dedup_threshold=0, pack=None, base_path=""):
+        self.master = master
+        # 后台缩放的结果通过事件循环交回Tk线程
+        self.event_loop = event_loop or EventLoop(master)
+        self.frame_cache = frame_cache or FrameCache()
+        # 缓存未命中时的逐帧处理分发到多个进程
+        self.frame_decoder = ParallelDecoder(decode_workers)
+        # 不活跃的状态压缩保存，超出预算时淘汰展开的PhotoImage；键为 (状态, 帧边长)
+        self.delta_frames = delta_frames
+        # 近似重复帧的合并阈值（各通道平均差异，0-255），0表示只合并完全相同的帧
+        self.dedup_threshold = dedup_threshold
+        self.dedup_stats = {}  # (状态, 帧边长) -> 合并重复帧的统计
+        self.frame_store = FrameStore(frame_budget, master=master, delta=delta_frames)
+
+        self.scale = scale
+        self.size = frame_size(scale)
+        self.levels = level_sizes()
+        # 帧或尺寸变化时加一，桌宠发现变化后重新获取当前状态的帧
+        self.generation = 0
+
+        self.frames = {}  # 状态 -> 图集帧列表（图集模式下常驻）
+        self.frame_durations = {}  # (状态, 帧边长) -> 每帧时长（毫秒），合并重复帧后各尺寸的帧数可能不同
+        self.frame_bounds = {}  # (状态, 帧边长) -> 所有帧不透明区域的并集
+        self.shown_keys = {}  # 状态 -> 最近一次 get_frames 返回的帧对应的键
+        self.decode_lock = threading.Lock()
+        self.decode_futures = {}  # (状态, 帧边长) -> Future
+        self.resample_futures = {}  # (状态, 帧边长) -> 后台生成准确尺寸的Future
+        self.decode_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gif-decode")
+        self.sprite_sheet = None
+        self.sheet_path = sheet_path
+        # 各状态的GIF路径（pet_assets 中的相对路径以 base_path 为准）
+        self.animation_files = {state: os.path.join(base_path, path) for state, path in ANIMATION_FILES.items()}
+        self.pack = None
+        self.packs = []  # 打开过的桌宠包，退出时一起关闭（声音可能还在从旧包流式播放，音频引擎要先关闭）
+
+        if pack is not None:
+            self.load_pack(pack)
+            return
+        if sheet_path and self.load_sheet(sheet_path):
+            return
+
+        # 首个显示的动画同步解码，其余在后台线程解码
+        self.get_frames(first_state)
+        for state, path in self.animation_files.items():
+            if state != first_state:
+                self.decode_futures[(state, self.size)] = self.decode_executor.submit(
+                    self.decode_frames, path, (self.size, self.size))
+
+    def load_sheet(self, sheet_path):
+        """从精灵图集加载全部状态，失败时返回False以回退到逐个解码GIF"""
+        try:
+            sheet = TkSpriteSheet.open(self.master, sheet_path, delta=self.delta_frames)
+        except Exception as e:
+            print(f"图集加载错误: {e}")
+            return False
+
+        for state, path in self.animation_files.items():
+            frames = sheet.states.get(state)
+            if frames:
+                self.frames[state] = frames
+                self.frame_durations[(state, sheet.frame_size[0])] = [frame.duration for frame in frames]
+                self.frame_bounds[(state, sheet.frame_size[0])] = sheet.bounds[state]
+            else:
+                print(f"图集中缺少状态 {state}，改为解码GIF")
+                self.decode_futures[(state, self.size)] = self.decode_executor.submit(
+                    self.decode_frames, path, (self.size, self.size))
+        self.sprite_sheet = sheet
+        return True
+
+    def load_pack(self, pack):
+        """登记桌宠包中每个尺寸、每个状态的帧（只读索引，不读帧数据）"""
+        self.pack = pack
+        if pack not in self.packs:
+            self.packs.append(pack)
+        for size in pack.sizes():
+            for state in pack.states(size):
+                key = (state, size)
+                self.frame_store.put_animation(key, PackedAnimation(pack, state, size))
+                self.frame_durations[key] = pack.durations(state, size)
+                self.frame_bounds[key] = pack.bounds(state, size)
+                self.dedup_stats[key] = pack.index.get("dedup", {}).get(f"{state}@{size}", {})
+        self.levels = pack.sizes() or level_sizes()
+
+    def use_pack(self, pack):
+        """换成另一个桌宠包：丢弃当前所有的帧，桌宠发现 generation 变化后从新包读取正在显示的状态"""
+        for future in self.decode_futures.values():
+            future.cancel()
+        for future in self.resample_futures.values():
+            future.cancel()
+        self.decode_futures.clear()
+        self.resample_futures.clear()
+        for key in self.frame_store.keys():
+            self.frame_store.discard(key)
+        self.frames.clear()
+        self.sprite_sheet = None
+        self.sheet_path = None
+        self.frame_durations.clear()
+        self.frame_bounds.clear()
+        self.dedup_stats.clear()
+        self.shown_keys.clear()
+        self.load_pack(pack)
+        self.generation += 1
+
+    def sheet_frames(self, state, size):
+        """图集中该状态的帧（仅当图集的帧尺寸正好是 size 时）"""
+        if self.sprite_sheet is not None and self.sprite_sheet.frame_size == (size, size):
+            return self.frames.get(state)
+        return None
+
+    def get_frames(self, state):
+        """获取状态在当前尺寸下的帧列表，PhotoImage只在切换到该状态时才在Tk线程上展开"""
+        key = (state, self.size)
+        if self.sheet_frames(state, self.size) is not None or key in self.frame_store:
+            return self.frames_for(key)
+
+        future = self.decode_futures.pop(key, None)
+        if future is not None:
+            # 后台还没轮到它时直接在当前线程解码
+            images = self.decode_frames(self.animation_files[state], (self.size, self.size)) \
+                if future.cancel() else future.result()
+            return self.put_frames(state, self.size, images)
+
+        if not self.has_frames(state):
+            return self.put_frames(state, self.size, self.source_frames(state, self.size))
+
+        # 先显示最接近的一级（金字塔级别通常可以直接从缓存读出），准确尺寸在后台生成
+        frames = self.frames_for(self.nearest_key(state))
+        if key not in self.frame_store:
+            self.request_resample(state, self.size)
+        return frames
+
+    def put_frames(self, state, size, images):
+        images, self.dedup_stats[(state, size)] = merge_duplicate_frames(images, self.dedup_threshold)
+        self.frame_durations[(state, size)] = [frame_duration(image) for image in images]
+        self.frame_bounds[(state, size)] = alpha_bounds(images)
+        self.frame_store.put((state, size), images)
+        return self.frames_for((state, size))
+
+    def frames_for(self, key):
+        """取出键对应的帧（图集帧或展开的PhotoImage），并记下该状态当前显示的是哪一组"""
+        state, size = key
+        self.shown_keys[state] = key
+        frames = self.sheet_frames(state, size)
+        return frames if frames is not None else self.frame_store.get(key)
+
+    def bounds(self, state):
+        """状态当前显示的帧的尺寸和不透明区域：((帧宽, 帧高), (left, top, right, bottom))"""
+        key = self.shown_keys.get(state, (state, self.size))
+        box = self.frame_bounds.get(key, (0, 0, key[1], key[1]))
+        return (key[1], key[1]), box
+
+    def has_frames(self, state):
+        return state in self.frames or any(key[0] == state for key in self.frame_store.keys())
+
+    def nearest_key(self, state):
+        """最接近当前尺寸的现成帧：优先取金字塔级别（可从缓存直接读取），其次是内存中已有的尺寸"""
+        level = nearest_level(self.size, self.levels)
+        if self.sheet_frames(state, level) is not None or (state, level) in self.frame_store:
+            return state, level
+
+        path = self.animation_files[state]
+        if os.path.exists(path):
+            images = self.frame_cache.lookup(path, (level, level), Image.LANCZOS)
+            if images:
+                self.put_frames(state, level, images)
+                return state, level
+
+        sizes = [key[1] for key in self.frame_store.keys() if key[0] == state]
+        if state in self.frames:
+            sizes.append(self.sprite_sheet.frame_size[0])
+        return state, nearest_level(self.size, sizes)
+
+    def set_scale(self, scale):
+        """切换所有桌宠的大小；不在金字塔上的尺寸先用最接近的一级显示"""
+        size = frame_size(scale)
+        self.scale = scale
+        if size == self.size:
+            return
+        self.size = size
+
+        # 只保留金字塔级别和当前尺寸，丢弃之前的非标准尺寸和已经用不上的后台任务
+        for key in self.frame_store.keys():
+            if key[1] != size and key[1] not in self.levels:
+                self.frame_store.discard(key)
+        for key, future in list(self.resample_futures.items()):
+            if key[1] != size and future.cancel():
+                del self.resample_futures[key]
+        self.generation += 1
+
+    def request_resample(self, state, size):
+        """在后台生成准确尺寸的帧，完成后由Tk线程放入帧存储"""
+        key = (state, size)
+        if key in self.resample_futures:
+            return
+        future = self.resample_futures[key] = self.decode_executor.submit(self.source_frames, state, size)
+        future.add_done_callback(lambda done: self.event_loop.call_soon_threadsafe(self.collect_resample, key, done))
+
+    def collect_resample(self, key, future):
+        """Tk线程：把完成的后台缩放结果放入帧存储（已被取消或替换的任务直接忽略）"""
+        if self.resample_futures.get(key) is not future:
+            return
+        del self.resample_futures[key]
+        if future.cancelled() or future.exception() is not None:
+            return
+        images = future.result()
+        if images and key[1] == self.size:
+            self.put_frames(key[0], key[1], images)
+            self.generation += 1
+
+    def source_frames(self, state, size):
+        """生成状态在指定尺寸下的PIL帧：有桌宠包时从包中最接近的一级缩放，
+        否则有GIF时从GIF处理，只有图集时从图集缩放"""
+        pack = self.pack
+        if pack is not None:
+            sizes = [level for level in pack.sizes() if state in pack.states(level)]
+            if sizes:
+                return resize_frames(pack.frames(state, nearest_level(size, sizes)), size)
+        path = self.animation_files[state]
+        if os.path.exists(path) or not self.sheet_path:
+            return self.decode_frames(path, (size, size))
+        try:
+            sheet, index = load_sheet(self.sheet_path)
+        except Exception as e:
+            print(f"图集加载错误: {e}")
+            return []
+        images = []
+        for entry in index["states"].get(state, []):
+            image = sheet.crop((entry["x"], entry["y"], entry["x"] + entry["w"], entry["y"] + entry["h"]))
+            image.info["duration"] = entry["duration"]
+            images.append(image)
+        return resize_frames(images, size)
+
+    def dedup_report(self):
+        """每个动画合并重复帧的统计：{"状态@帧边长": {"frames", "kept", "bytes_saved"}}"""
+        return {f"{state}@{size}": stats for (state, size), stats in self.dedup_stats.items()}
+
+    def durations(self, state):
+        """状态当前显示的那组帧的每帧时长（毫秒）"""
+        return self.frame_durations.get(self.shown_keys.get(state, (state, self.size)), [])
+
+    def decode_frames(self, path, target_size=(120, 120)):
+        """解码GIF为PIL图像列表（不涉及Tk，可在后台线程运行）"""
+        try:
+            with self.decode_lock:
+                return self.frame_cache.load_or_build(path, target_size, Image.LANCZOS,
+                                                      builder=self.frame_decoder.decode_gif)
+        except Exception as e:
+            print(f"GIF加载错误: {e}")
+            # 回退到简单加载
+            try:
+                gif = Image.open(path)
+                return [frame.convert("RGBA") for frame in ImageSequence.Iterator(gif)]
+            except:
+                print(f"无法加载GIF: {path}")
+                return []
+
+    def shutdown(self, wait=False):
+        self.resample_futures.clear()
+        self.decode_executor.shutdown(wait=wait, cancel_futures=True)
+        self.frame_decoder.shutdown(wait=wait)
+        for pack in self.packs:
+            pack.close()
+        self.packs.clear()
@@ -0,0 +1,41 @@
+"""多分辨率帧金字塔
+
+每个动画预先按几个固定比例（0.5x、1x、1.5x、2x）处理好，作为帧缓存中的独立条目。
+切换桌宠大小时先显示最接近的一级，准确尺寸的LANCZOS缩放在后台完成后再替换上去。
+"""
+import math
+
+from PIL import Image
+
+from gif_frames import frame_duration
+
+# 基准帧边长（1x）
+BASE_SIZE = 120
+# 预先生成的级别
+PYRAMID_SCALES = (0.5, 1.0, 1.5, 2.0)
+# 右键菜单中可选的大小
+SCALE_CHOICES = (0.5, 0.75, 1.0, 1.25, 1.5, 2.0)
+
+
+def frame_size(scale, base=BASE_SIZE):
+    """缩放比例对应的帧边长"""
+    return max(1, round(base * scale))
+
+
+def level_sizes(base=BASE_SIZE, scales=PYRAMID_SCALES):
+    return sorted({frame_size(scale, base) for scale in scales})
+
+
+def nearest_level(size, levels):
+    """按比例（而不是差值）选出最接近的级别，距离相同时取较大的一级"""
+    return min(levels, key=lambda level: (abs(math.log(level / size)), -level))
+
+
+def resize_frames(images, size, resample=Image.LANCZOS):
+    """把一组帧缩放到 size x size，保留每帧时长"""
+    frames = []
+    for image in images:
+        frame = image if image.size == (size, size) else image.resize((size, size), resample)
+        frame.info["duration"] = frame_duration(image)
+        frames.append(frame)
+    return frames
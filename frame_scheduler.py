@@ -0,0 +1,82 @@
+"""基于单调时钟的帧调度
+
+每一帧的截止时间都从动画开始时刻累加GIF自带的帧时长得出，
+不受回调执行时间影响；回调来晚时直接跳到当前应显示的帧，而不是放慢播放。
+"""
+import bisect
+import math
+import statistics
+import time
+from collections import deque
+
+from gif_frames import DEFAULT_FRAME_DURATION
+
+
+class FrameClock:
+    def __init__(self, durations=None, start=None, window=120):
+        # 最近若干次回调的 (实际时间, 相对截止时间的延迟)
+        self.ticks = deque(maxlen=window)
+        # 最近若干次换帧的时间
+        self.shown_times = deque(maxlen=window)
+        self.frames_shown = 0
+        self.frames_skipped = 0
+        self.reset(durations or [DEFAULT_FRAME_DURATION], start)
+
+    def reset(self, durations, start=None):
+        """切换动画：durations 为每帧时长（毫秒），start 为第0帧的显示时刻"""
+        self.durations = [max(1, d) / 1000 for d in durations] or [DEFAULT_FRAME_DURATION / 1000]
+        self.offsets = [0.0]
+        for duration in self.durations[:-1]:
+            self.offsets.append(self.offsets[-1] + duration)
+        self.cycle = self.offsets[-1] + self.durations[-1]
+        self.start = time.monotonic() if start is None else start
+        self.deadline = self.start
+        self.absolute_frame = None
+
+    def advance(self, now=None):
+        """返回 (帧索引, 下一帧的截止时间)，落后时跳过错过的帧"""
+        if now is None:
+            now = time.monotonic()
+        self.ticks.append((now, max(0.0, now - self.deadline)))
+
+        cycles, position = divmod(max(0.0, now - self.start), self.cycle)
+        index = min(bisect.bisect_right(self.offsets, position) - 1, len(self.durations) - 1)
+        absolute_frame = int(cycles) * len(self.durations) + index
+
+        if absolute_frame != self.absolute_frame:
+            if self.absolute_frame is not None:
+                self.frames_skipped += max(0, absolute_frame - self.absolute_frame - 1)
+            self.absolute_frame = absolute_frame
+            self.frames_shown += 1
+            self.shown_times.append(now)
+
+        self.deadline = self.start + cycles * self.cycle + self.offsets[index] + self.durations[index]
+        return index, self.deadline
+
+    def delay_ms(self, now=None):
+        """距离下一帧截止时间的毫秒数（向上取整，避免提前触发）"""
+        if now is None:
+            now = time.monotonic()
+        return max(1, math.ceil((self.deadline - now) * 1000))
+
+    @property
+    def fps(self):
+        """最近窗口内实际的换帧速率"""
+        if len(self.shown_times) < 2:
+            return 0.0
+        span = self.shown_times[-1] - self.shown_times[0]
+        return (len(self.shown_times) - 1) / span if span > 0 else 0.0
+
+    @property
+    def mean_lateness_ms(self):
+        """最近窗口内回调相对截止时间的平均延迟（毫秒）"""
+        if not self.ticks:
+            return 0.0
+        return sum(late for _, late in self.ticks) / len(self.ticks) * 1000
+
+    @property
+    def jitter_ms(self):
+        """最近窗口内延迟的标准差（毫秒）：每次都晚同样多时为0"""
+        if len(self.ticks) < 2:
+            return 0.0
+        return statistics.pstdev(late for _, late in self.ticks) * 1000
@@ -0,0 +1,154 @@
+"""带内存预算的帧存储
+
+不活跃的状态只保存zlib压缩后的RGBA数据；切换到某个状态时才展开为PhotoImage。
+展开后的状态超出预算时，按最近最少使用顺序丢弃PhotoImage（压缩数据保留），
+当前正在使用的状态不会被淘汰。
+
+相同内容的帧（按哈希识别，通常来自不同状态）展开时共用同一个PhotoImage。
+
+增量模式（delta=True）下展开为关键帧加脏矩形补丁（见 delta_frames.py），而不是每帧一张完整的PhotoImage。
+"""
+import hashlib
+import time
+import weakref
+import zlib
+from collections import OrderedDict
+
+from PIL import Image, ImageTk
+
+from delta_frames import DeltaAnimation
+
+# 默认展开预算 32MB
+DEFAULT_BUDGET = 32 * 1024 * 1024
+COMPRESS_LEVEL = 1
+
+
+class CompactAnimation:
+    """压缩保存的一组帧，同时记录每帧内容的哈希"""
+    __slots__ = ("size", "buffers", "digests")
+
+    def __init__(self, images):
+        self.size = images[0].size if images else (0, 0)
+        self.buffers = []
+        self.digests = []
+        for image in images:
+            data = image.convert("RGBA").tobytes()
+            self.buffers.append((image.size, zlib.compress(data, COMPRESS_LEVEL)))
+            self.digests.append(hashlib.blake2b(data, digest_size=16).hexdigest() + f"{image.size}")
+
+    @property
+    def nbytes(self):
+        return sum(len(data) for _, data in self.buffers)
+
+    def expand(self):
+        """解压为PIL图像列表"""
+        return [Image.frombuffer("RGBA", size, zlib.decompress(data), "raw", "RGBA", 0, 1)
+                for size, data in self.buffers]
+
+
+class FrameStore:
+    def __init__(self, budget=DEFAULT_BUDGET, master=None, delta=False):
+        self.budget = budget
+        self.master = master
+        self.delta = delta
+        self.compact = {}  # 状态 -> CompactAnimation（或接口相同的 PackedAnimation）
+        self.expanded = OrderedDict()  # 状态 -> (帧列表, 字节数)，按使用顺序排列
+        # 帧内容哈希 -> 已展开的PhotoImage，所有引用它的状态都被淘汰后自动释放
+        self.photo_pool = weakref.WeakValueDictionary()
+        self.shared_photos = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.last_expand_ms = 0.0
+        self.total_expand_ms = 0.0
+
+    def __contains__(self, state):
+        return state in self.compact
+
+    def put(self, state, images):
+        """保存一个状态的帧（只保留压缩数据）"""
+        self.compact[state] = CompactAnimation(images)
+        self.expanded.pop(state, None)
+
+    def put_animation(self, state, animation):
+        """保存一组已经是存储格式的帧（例如 pet_pack.PackedAnimation，帧数据留在映射的文件中）"""
+        self.compact[state] = animation
+        self.expanded.pop(state, None)
+
+    def keys(self):
+        return list(self.compact)
+
+    def discard(self, state):
+        """删除一个状态的压缩数据和展开的PhotoImage"""
+        self.compact.pop(state, None)
+        self.expanded.pop(state, None)
+
+    def get(self, state):
+        """取出状态的帧列表（PhotoImage或增量帧），需要时从压缩数据展开"""
+        entry = self.expanded.get(state)
+        if entry is not None:
+            self.hits += 1
+            self.expanded.move_to_end(state)
+            return entry[0]
+
+        self.misses += 1
+        start = time.perf_counter()
+        animation = self.compact[state]
+        images = animation.expand()
+        if self.delta and images:
+            animation = DeltaAnimation(images, master=self.master)
+            frames, nbytes = animation.frames, animation.nbytes
+        else:
+            frames = [self.photo(digest, image) for digest, image in zip(animation.digests, images)]
+            nbytes = sum(image.width * image.height * 4 for image in images)
+        self.last_expand_ms = (time.perf_counter() - start) * 1000
+        self.total_expand_ms += self.last_expand_ms
+
+        self.expanded[state] = (frames, nbytes)
+        self.evict(keep=state)
+        return frames
+
+    def photo(self, digest, image):
+        """相同内容的帧共用一个PhotoImage"""
+        photo = self.photo_pool.get(digest)
+        if photo is not None:
+            self.shared_photos += 1
+            return photo
+        photo = self.photo_pool[digest] = ImageTk.PhotoImage(image, master=self.master)
+        return photo
+
+    def evict(self, keep=None):
+        """展开的数据超出预算时丢弃最久未使用的状态"""
+        for state in list(self.expanded):
+            if self.expanded_bytes + self.compact_bytes <= self.budget:
+                break
+            if state == keep:
+                continue
+            del self.expanded[state]
+            self.evictions += 1
+
+    @property
+    def expanded_bytes(self):
+        return sum(nbytes for _, nbytes in self.expanded.values())
+
+    @property
+    def compact_bytes(self):
+        return sum(animation.nbytes for animation in self.compact.values())
+
+    def stats(self):
+        """当前占用和命中情况，用于在低内存机器上调整预算"""
+        expansions = self.misses
+        return {
+            "budget": self.budget,
+            "delta": self.delta,
+            "expanded_bytes": self.expanded_bytes,
+            "compact_bytes": self.compact_bytes,
+            "expanded_states": list(self.expanded),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "shared_photos": self.shared_photos,
+            "last_expand_ms": round(self.last_expand_ms, 2),
+            "avg_expand_ms": round(self.total_expand_ms / expansions, 2) if expansions else 0.0,
+        }
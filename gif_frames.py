@@ -0,0 +1,156 @@
+"""GIF帧处理工具（纯Pillow实现，不依赖Tk）"""
+import hashlib
+from functools import reduce
+
+from PIL import Image, ImageChops, ImageSequence, ImageStat
+
+# alpha二值化查找表：alpha为0的像素保持透明，其余全部不透明
+_ALPHA_LUT = [0] + [255] * 255
+
+# GIF未指定帧时长（或时长过短）时使用的默认值，单位毫秒
+DEFAULT_FRAME_DURATION = 50
+MIN_FRAME_DURATION = 20
+
+
+def frame_duration(frame):
+    """读取帧时长（毫秒），缺失或小于20ms时按默认值处理，与浏览器的做法一致"""
+    duration = frame.info.get("duration") or 0
+    if duration < MIN_FRAME_DURATION:
+        return DEFAULT_FRAME_DURATION
+    return int(duration)
+
+
+def build_alpha_mask(frame, transparency):
+    """整帧生成透明度蒙版，结果与逐像素判断完全一致
+
+    RGBA帧：alpha为0的像素透明；调色板/灰度帧：索引等于transparency的像素透明。
+    """
+    if frame.mode == "RGBA":
+        return frame.getchannel("A").point(_ALPHA_LUT)
+
+    if frame.mode in ("P", "L"):
+        lut = [255] * 256
+        if isinstance(transparency, int) and 0 <= transparency < 256:
+            lut[transparency] = 0
+        # 直接把索引数据当作灰度图处理，避免调色板映射
+        indices = Image.frombytes("L", frame.size, frame.tobytes())
+        return indices.point(lut)
+
+    # 其他模式没有可判断的透明像素
+    return Image.new("L", frame.size, 255)
+
+
+def alpha_bounds(images):
+    """一组帧中不透明像素的并集包围盒 (left, top, right, bottom)，全部透明时返回整帧"""
+    left = top = right = bottom = None
+    for image in images:
+        box = image.getchannel("A").getbbox() if image.mode == "RGBA" else (0, 0) + image.size
+        if box is None:
+            continue
+        if left is None:
+            left, top, right, bottom = box
+        else:
+            left, top = min(left, box[0]), min(top, box[1])
+            right, bottom = max(right, box[2]), max(bottom, box[3])
+    if left is None:
+        return (0, 0) + (images[0].size if images else (0, 0))
+    return left, top, right, bottom
+
+
+def delta_boxes(images):
+    """每帧相对前一帧变化区域的包围盒（第0帧相对最后一帧，循环播放时用），完全相同时为None
+
+    RGBA四个通道中任何一个不同都算变化；尺寸不同时整帧都算变化。
+    """
+    boxes = []
+    for index, image in enumerate(images):
+        previous = images[index - 1]
+        if previous.size != image.size:
+            boxes.append((0, 0) + image.size)
+            continue
+        difference = ImageChops.difference(image.convert("RGBA"), previous.convert("RGBA"))
+        boxes.append(reduce(ImageChops.lighter, difference.split()).getbbox())
+    return boxes
+
+
+def frame_digest(image):
+    """帧内容的哈希（模式、尺寸和像素），用于识别重复帧"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{image.mode}{image.size}".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def frames_similar(a, b, threshold):
+    """两帧各通道的平均差异都不超过 threshold（0-255）时视为近似重复；threshold 为0时不比较"""
+    if threshold <= 0 or a.size != b.size:
+        return False
+    difference = ImageChops.difference(a.convert("RGBA"), b.convert("RGBA"))
+    return max(ImageStat.Stat(difference).mean) <= threshold
+
+
+def merge_duplicate_frames(images, threshold=0):
+    """合并连续的重复帧：只保留每段的第一帧，时长为整段之和，返回 (帧列表, 统计)
+
+    完全相同的帧按哈希识别；threshold 大于0时，与该段第一帧近似的帧也合并。
+    保留帧的 info["duration"] 改为合并后的时长，每一段的起止时刻和动画总时长都与原来相同。
+    统计中的 bytes_saved 按展开后的RGBA大小计算。
+    """
+    kept, durations = [], []
+    last_digest = None
+    for image in images:
+        digest = frame_digest(image)
+        if kept and (digest == last_digest or frames_similar(kept[-1], image, threshold)):
+            durations[-1] += frame_duration(image)
+            continue
+        kept.append(image)
+        durations.append(frame_duration(image))
+        last_digest = digest
+
+    for image, duration in zip(kept, durations):
+        image.info["duration"] = duration
+    bytes_saved = sum(image.width * image.height * 4 for image in images) \
+        - sum(image.width * image.height * 4 for image in kept)
+    return kept, {"frames": len(images), "kept": len(kept), "bytes_saved": bytes_saved}
+
+
+def process_frame(frame, global_palette, target_size=(120, 120), resample=Image.LANCZOS):
+    """单帧抠图并缩放，返回独立的RGBA图像（可在子进程中运行）
+
+    帧时长保留在结果的 info["duration"] 中。
+    """
+    duration = frame_duration(frame)
+    # 保留原始模式处理
+    if frame.mode == 'P':
+        # 应用全局调色板保持一致性
+        if global_palette:
+            frame.putpalette(global_palette)
+
+        # 转换为RGBA并保留原始颜色
+        frame = frame.convert("RGBA")
+
+        # 精确提取透明度（整帧运算，不再逐像素循环）
+        if 'transparency' in frame.info:
+            transparency = frame.info['transparency']
+            mask = build_alpha_mask(frame, transparency)
+            frame.putalpha(mask)
+
+    # 高质量缩放
+    if frame.size != target_size:
+        frame = frame.resize(target_size, resample)
+
+    # 统一为独立的RGBA图像，脱离GIF解码器的状态
+    frame = frame.convert("RGBA")
+    frame.info["duration"] = duration
+    return frame
+
+
+def decode_gif(path, target_size=(120, 120), resample=Image.LANCZOS):
+    """解码GIF并逐帧抠图、缩放，返回RGBA格式的PIL图像列表"""
+    gif = Image.open(path)
+
+    # 获取全局调色板
+    global_palette = gif.getpalette()
+
+    return [process_frame(frame, global_palette, target_size, resample)
+            for frame in ImageSequence.Iterator(gif)]
@@ -0,0 +1,177 @@
+"""可选的性能埋点
+
+开启后为桌宠的Tk回调计时，并记录事件循环延迟（任务登记的截止时间与实际执行时间之差），
+两者都保存为滚动窗口内的直方图，另外附上事件循环每秒的唤醒次数和音频引擎中每个声音的内存占用和加载耗时。
+统计可以在右键菜单打开的小窗口里实时查看，退出时写入JSON文件，也可以同时用cProfile采样并导出pstats文件。
+"""
+import cProfile
+import json
+import time
+import tkinter as tk
+from collections import deque
+
+# 被计时的回调
+CALLBACKS = ("update_animation", "update_behavior", "on_drag", "on_click", "show_special_image")
+
+# 直方图分桶上限（毫秒），最后一个桶收集更大的值
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class RollingHistogram:
+    """最近 window 个样本（秒）的分布"""
+
+    def __init__(self, window=500):
+        self.samples = deque(maxlen=window)
+        self.total = 0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.total += 1
+
+    def percentile(self, p):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+
+    def buckets(self):
+        """各分桶的样本数，键为桶的上限（毫秒）"""
+        counts = dict.fromkeys([f"<={edge}" for edge in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}"], 0)
+        for seconds in self.samples:
+            ms = seconds * 1000
+            for edge in BUCKETS_MS:
+                if ms <= edge:
+                    counts[f"<={edge}"] += 1
+                    break
+            else:
+                counts[f">{BUCKETS_MS[-1]}"] += 1
+        return counts
+
+    def summary(self):
+        count = len(self.samples)
+        return {
+            "total": self.total,
+            "window": count,
+            "mean_ms": round(sum(self.samples) / count * 1000, 3) if count else 0.0,
+            "p50_ms": round(self.percentile(0.5), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "max_ms": round(max(self.samples) * 1000, 3) if count else 0.0,
+            "histogram": self.buckets(),
+        }
+
+
+class Instrumentation:
+    def __init__(self, window=500, cprofile_path=None):
+        self.window = window
+        self.durations = {}  # 回调名 -> RollingHistogram
+        self.lag = {}  # 事件循环任务的回调名 -> RollingHistogram
+        self.cprofile_path = cprofile_path
+        self.profiler = cProfile.Profile() if cprofile_path else None
+        self.stats_window = None
+        self.pet = None
+
+    def histogram(self, table, name):
+        histogram = table.get(name)
+        if histogram is None:
+            histogram = table[name] = RollingHistogram(self.window)
+        return histogram
+
+    def install(self, pet):
+        """在实例上替换回调并接入事件循环，必须在绑定事件和启动动画之前调用"""
+        for name in CALLBACKS:
+            setattr(pet, name, self.timed(name, getattr(pet, name)))
+
+        pet.event_loop.observer = self.record_lag
+        # 音频引擎在桌宠初始化的最后才创建，取统计时再从桌宠上读取
+        self.pet = pet
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def record_lag(self, name, seconds):
+        self.histogram(self.lag, name).add(seconds)
+
+    def timed(self, name, method):
+        histogram = self.histogram(self.durations, name)
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                histogram.add(time.perf_counter() - start)
+        wrapper.__name__ = name
+        return wrapper
+
+    def wakeup_report(self):
+        """事件循环的唤醒统计：总次数、执行的任务数和最近一段时间内每秒的唤醒次数"""
+        event_loop = getattr(self.pet, "event_loop", None)
+        if event_loop is None:
+            return {}
+        return {
+            "wakeups": event_loop.wakeups,
+            "tasks_run": event_loop.tasks_run,
+            "wakeups_per_second": round(event_loop.wakeups_per_second, 2),
+        }
+
+    def audio_report(self):
+        """每个声音的内存占用和加载耗时（见 AudioEngine.report）"""
+        audio = getattr(self.pet, "audio", None)
+        return audio.report() if audio is not None else {}
+
+    def snapshot(self):
+        return {
+            "callbacks": {name: h.summary() for name, h in self.durations.items()},
+            "event_loop_lag": {name: h.summary() for name, h in self.lag.items()},
+            "event_loop": self.wakeup_report(),
+            "audio": self.audio_report(),
+        }
+
+    def format_text(self):
+        """统计窗口中显示的文本"""
+        lines = [f"{'回调':<20}{'次数':>7}{'平均':>9}{'p95':>9}{'最大':>9}  (ms)"]
+        for name, histogram in self.durations.items():
+            s = histogram.summary()
+            lines.append(f"{name:<20}{s['total']:>7}{s['mean_ms']:>9.2f}{s['p95_ms']:>9.2f}{s['max_ms']:>9.2f}")
+        lines.append("")
+        lines.append(f"{'事件循环延迟':<20}{'次数':>7}{'平均':>9}{'p95':>9}{'最大':>9}  (ms)")
+        for name, histogram in self.lag.items():
+            s = histogram.summary()
+            lines.append(f"{name:<20}{s['total']:>7}{s['mean_ms']:>9.2f}{s['p95_ms']:>9.2f}{s['max_ms']:>9.2f}")
+        wakeups = self.wakeup_report()
+        if wakeups:
+            lines.append(f"唤醒 {wakeups['wakeups']} 次，执行任务 {wakeups['tasks_run']} 个，"
+                         f"最近每秒 {wakeups['wakeups_per_second']:.1f} 次")
+        lines.append("")
+        lines.append(f"{'声音':<20}{'类型':>7}{'内存KB':>9}{'加载ms':>9}")
+        for name, info in self.audio_report().items():
+            lines.append(f"{name:<20}{info['kind']:>7}{info['bytes'] / 1024:>9.1f}{info['load_ms']:>9.2f}")
+        return "\n".join(lines)
+
+    def show_window(self, master, event_loop):
+        """打开（或前置）实时统计窗口，每500ms刷新一次"""
+        if self.stats_window is not None and self.stats_window.winfo_exists():
+            self.stats_window.lift()
+            return
+
+        window = tk.Toplevel(master)
+        window.title("性能统计")
+        window.attributes("-topmost", True)
+        label = tk.Label(window, font=("Courier", 10), justify=tk.LEFT, anchor="nw", padx=10, pady=10)
+        label.pack(fill=tk.BOTH, expand=True)
+        self.stats_window = window
+
+        def refresh():
+            if not window.winfo_exists():
+                return
+            label.configure(text=self.format_text())
+            event_loop.call_later(0.5, refresh)
+        refresh()
+
+    def dump(self, path=None):
+        """把统计写入JSON文件，并导出cProfile结果（如果开启）"""
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.cprofile_path)
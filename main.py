@@ -1,26 +1,64 @@
 import tkinter as tk
-from PIL import Image, ImageTk, ImageSequence
 import random
 import time
 import os
 import sys
-import pygame
+import argparse
+import multiprocessing
+from frame_cache import FrameCache
+from parallel_decode import ParallelDecoder
+from frame_scheduler import FrameClock
+from event_loop import EventLoop
+from pet_renderer import PetRenderer
+from gif_frames import DEFAULT_FRAME_DURATION
+from pet_assets import (ANIMATION_FILES, BAKED_FRAMES_DIR, BAKED_SHEET, DEFAULT_PACK, IMAGE_FILES,
+                        SOUND_FILES, STREAM_FILES)
+from pet_behavior import BEHAVIOR_STATES, WALK_STEP, DANCE_STEP, STATE_CHANGE_TIME, BEHAVIOR_INTERVAL
+from frame_store import DEFAULT_BUDGET
+from frame_library import FrameLibrary
+from frame_pyramid import SCALE_CHOICES, level_sizes
+from pet_manager import PetManager, release_shared
+from pet_pack import PetPack, installed_packs
+from audio import AudioEngine
+from popup_images import PopupImageCache
+from power import ACTIVE, IDLE_TIMEOUT, PowerMonitor
+from instrumentation import Instrumentation
 
 class DesktopPet:
-    def __init__(self, root):
+    def __init__(self, root, frame_cache=None, decode_workers=None, sheet_path=None,
+                 frame_budget=DEFAULT_BUDGET, audio_enabled=True, instrumentation=None,
+                 frame_library=None, audio=None, manager=None, scale=1.0, idle_timeout=IDLE_TIMEOUT,
+                 event_loop=None, delta_frames=False, dedup_threshold=0, pack=None, popup_images=None,
+                 base_path=None):
         self.root = root
+        # 多只桌宠时由 PetManager 管理，并共享帧库、音频和事件循环
+        self.manager = manager
+        # 动画、行为和所有定时任务都登记到同一个事件循环
+        self.owns_event_loop = event_loop is None
+        self.event_loop = event_loop or EventLoop(root)
+        # 可选的性能埋点，需要在绑定事件和启动动画之前安装
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            instrumentation.install(self)
+        self.frame_cache = frame_cache
+        self.decode_workers = decode_workers
+        self.sheet_path = sheet_path
+        # 桌宠包（pet_pack.py）优先于图集和GIF，帧在显示时才从映射的文件中读取
+        self.pack = pack
+        self.frame_budget = frame_budget
+        self.scale = scale
+        self.delta_frames = delta_frames
+        self.dedup_threshold = dedup_threshold
+        self.frame_library = frame_library
+        self.owns_frame_library = frame_library is None
         self.root.overrideredirect(True)
         self.root.attributes("-topmost", True)
-        self.root.geometry("450x450+500+500")
+        self.root.geometry("+500+500")
 
-        # 获取当前脚本所在目录
-        if getattr(sys, 'frozen', False):
-            base_path = sys._MEIPASS
-        else:
-            base_path = os.path.dirname(os.path.abspath(__file__))
-        self.base_path = base_path
+        # 素材所在目录（默认为脚本所在目录），pet_assets 中的相对路径都以它为准
+        self.base_path = base_path or resource_base_path()
 
-        # 创建透明画布 - 使用跨平台透明色
+        # 创建透明画布 - 使用跨平台透明色（尺寸随帧的不透明区域变化，见 update_bounds）
         self.canvas_frame = tk.Frame(root, bg='#abcdef')
         self.canvas_frame.pack(fill=tk.BOTH, expand=True)
 
@@ -28,14 +66,15 @@ class DesktopPet:
             self.canvas_frame,
             highlightthickness=0,
             bg='#abcdef',
-            width=450,
-            height=450
         )
         self.canvas.pack(fill=tk.BOTH, expand=True)
 
 
-        # 设置透明色 - 使用独特颜色
-        self.root.attributes("-transparentcolor", "#abcdef")
+        # 设置透明色 - 使用独特颜色（只有Windows支持，其他平台忽略）
+        try:
+            self.root.attributes("-transparentcolor", "#abcdef")
+        except tk.TclError:
+            pass
 
         self.x = 500
         self.y = 500
@@ -45,14 +84,23 @@ class DesktopPet:
         self.load_images()
 
         # 在画布上创建图像
-        self.pet_image = self.canvas.create_image(225, 225, image=self.sing_frames[0])
-
         self.state = "sing"
+        self.animation_state = self.state
         self.frame_index = 0
-        self.current_frames = self.sing_frames
+        self.current_frames = self.get_frames(self.state)
+        self.frames_generation = self.frame_library.generation
+        self.pet_image = self.canvas.create_image(0, 0, anchor=tk.NW)
+        self.renderer = PetRenderer(self.root, self.canvas, self.pet_image, position=(self.x, self.y),
+                                    event_loop=self.event_loop)
+        self.update_bounds()
+        self.renderer.show(self.current_frames[0])
+
+        # 按GIF自带的帧时长调度动画
+        self.frame_clock = FrameClock(self.frame_library.durations(self.state))
+        self.animation_job = None
 
-        self.state_change_time = 5
-        self.last_state_change = time.time()
+        self.state_change_time = STATE_CHANGE_TIME
+        self.last_state_change = time.monotonic()
 
         # 绑定事件
         self.canvas.bind("<Button-1>", self.on_click)
@@ -60,116 +108,149 @@ class DesktopPet:
         self.canvas.bind("<ButtonRelease-1>", self.on_release)
         self.canvas.bind("<Button-3>", self.show_context_menu)
 
-        # 使用单独的动画更新线程
+        # 窗口隐藏、被遮挡或用户长时间无操作时降低刷新频率，鼠标交互时立即恢复
+        self.power = PowerMonitor(self.root, self.canvas, idle_timeout, on_wake=self.wake)
+        self.behavior_job = None
+
+        # 动画和行为各自登记到事件循环，多只桌宠同时到期的任务在同一次唤醒中执行
         self.animation_running = True
         self.update_animation()
         self.update_behavior()
 
         # 添加图片显示配置
         self.image_config = {
-            "image_path": "images/special_image.png",  # 默认图片路径
+            "image_path": IMAGE_FILES["special"],  # 图片路径，相对于 base_path（保持默认时使用桌宠包中的图片）
             "image_size": (600, 600),  # 默认显示尺寸
             "display_time": 10000  # 显示时间(毫秒)
         }
+        # 弹窗图片在后台解码缩放并缓存，启动后提前加载（多只桌宠时共享 PetManager 的缓存，由它预加载一次）
+        self.owns_popup_images = popup_images is None
+        self.popup_images = popup_images or PopupImageCache(self.root, self.event_loop)
+        if self.owns_popup_images:
+            self.popup_images.prefetch(self.special_image(), self.image_config["image_size"])
 
-        pygame.mixer.init()
-        self.drag_sound = pygame.mixer.Sound("sounds/结束乐队-ラブソングが歌えない.wav")  # Path to your sound file
-        self.xi_sound = pygame.mixer.Sound("sounds/結束バンド - 転がる岩、君に朝が降る (翻转岩石，晨光洒落你身).mp3")
+        # 音效在后台加载，长曲目流式播放
+        self.owns_audio = audio is None
+        self.audio = audio or create_audio(self.event_loop, audio_enabled, self.frame_library.pack,
+                                           self.base_path)
 
 
     def load_images(self):
-        """加载并优化GIF图像处理"""
+        """加载GIF：首个显示的动画同步解码，其余在后台线程解码"""
         # self.idle_frames = self.optimize_gif(os.path.join(self.base_path, "Bochhi/DeskPets/enjoyingMusic_Bocchi.gif"))
         # idle抠图效果一直不好我就放弃了
-        self.walk_frames = self.optimize_gif("Bochhi/DeskPets/(4).gif")
-        self.dance_frames = self.optimize_gif("Bochhi/DeskPets/(3).gif")
-        self.sing_frames = self.optimize_gif("Bochhi/DeskPets/(1).gif")
-        self.crazy_frames = self.optimize_gif("Bochhi/DeskPets/(2).gif")
+        if self.frame_library is None:
+            if self.frame_cache is None:
+                self.frame_cache = create_frame_cache()
+            self.frame_library = FrameLibrary(
+                self.root,
+                frame_cache=self.frame_cache,
+                decode_workers=self.decode_workers,
+                sheet_path=self.sheet_path,
+                frame_budget=self.frame_budget,
+                scale=self.scale,
+                event_loop=self.event_loop,
+                delta_frames=self.delta_frames,
+                dedup_threshold=self.dedup_threshold,
+                pack=self.pack,
+                base_path=self.base_path,
+            )
 
-    def optimize_gif(self, path, target_size=(120, 120)):
-        """加载并优化GIF，保持透明度和清晰度"""
-        try:
-            gif = Image.open(path)
-            frames = []
-
-            # 获取全局调色板
-            global_palette = gif.getpalette()
-
-            for frame in ImageSequence.Iterator(gif):
-                # 保留原始模式处理
-                if frame.mode == 'P':
-                    # 应用全局调色板保持一致性
-                    if global_palette:
-                        frame.putpalette(global_palette)
-
-                    # 转换为RGBA并保留原始颜色
-                    frame = frame.convert("RGBA")
-
-                    # 精确提取透明度
-                    if 'transparency' in frame.info:
-                        transparency = frame.info['transparency']
-                        # 创建精确的透明度蒙版
-                        mask = Image.new("L", frame.size, 255)
-                        mask_data = []
-                        for y in range(frame.size[1]):
-                            for x in range(frame.size[0]):
-                                pix = frame.getpixel((x, y))
-                                # 检查是否透明像素
-                                if isinstance(pix, int) and pix == transparency:
-                                    mask_data.append(0)
-                                elif isinstance(pix, tuple) and pix[3] == 0:
-                                    mask_data.append(0)
-                                else:
-                                    mask_data.append(255)
-                        mask.putdata(mask_data)
-                        frame.putalpha(mask)
-
-                # 高质量缩放
-                if frame.size != target_size:
-                    frame = frame.resize(target_size, Image.LANCZOS)
-
-                # 创建PhotoImage时保留透明度
-                photo = ImageTk.PhotoImage(frame)
-                frames.append(photo)
-
-            return frames
-        except Exception as e:
-            print(f"GIF加载错误: {e}")
-            # 回退到简单加载
-            try:
-                gif = Image.open(path)
-                return [ImageTk.PhotoImage(frame.copy()) for frame in ImageSequence.Iterator(gif)]
-            except:
-                print(f"无法加载GIF: {path}")
-                return []
+    def get_frames(self, state):
+        """获取状态对应的帧列表（与其他桌宠共享）"""
+        return self.frame_library.get_frames(state)
+
+    def update_bounds(self):
+        """窗口收缩到当前动画所有帧的不透明区域"""
+        self.frame_size, self.sprite_box = self.frame_library.bounds(self.animation_state)
+        self.renderer.set_bounds(self.sprite_box)
+
+    def clamp_position(self, x, y):
+        """限制位置，使桌宠的不透明区域留在屏幕内"""
+        screen_width, screen_height = self.renderer.screen_size
+        left, top, right, bottom = self.sprite_box
+        x = max(-left, min(screen_width - right, x))
+        y = max(-top, min(screen_height - bottom, y))
+        return int(x), int(y)
+
+    def play_animation(self, state, start=None):
+        """切换到指定状态的动画，从第0帧开始按帧时长播放"""
+        self.animation_state = state
+        self.current_frames = self.get_frames(state)
+        self.frames_generation = self.frame_library.generation
+        self.update_bounds()
+        self.frame_index = 0
+        self.frame_clock.reset(self.frame_library.durations(state), start)
 
-    def update_animation(self):
-        """专用的动画更新函数"""
-        if self.animation_running and self.current_frames:
-            # 计算帧索引
-            if self.is_dragging:
-                elapsed = time.time() - self.drag_start_time
-                frame_rate = 10
-                self.frame_index = int(elapsed * frame_rate) % len(self.crazy_frames)
-            else:
-                self.frame_index = (self.frame_index + 1) % len(self.current_frames)
+        # 立即显示新动画的第0帧，不必等待上一个动画的截止时间
+        self.event_loop.cancel(self.animation_job)
+        self.update_animation()
 
-            # 更新画布上的图像
-            self.canvas.itemconfig(self.pet_image, image=self.current_frames[self.frame_index])
+    def render_frame(self):
+        """按单调时钟显示当前应显示的帧，返回距下一帧的毫秒数"""
+        delay = DEFAULT_FRAME_DURATION
+        if self.frames_generation != self.frame_library.generation:
+            # 帧库换了尺寸、换上了准确尺寸的帧或换了桌宠包，保持动画的起始时刻继续播放
+            self.current_frames = self.get_frames(self.animation_state)
+            self.frames_generation = self.frame_library.generation
+            self.frame_clock.reset(self.frame_library.durations(self.animation_state), self.frame_clock.start)
+            self.update_bounds()
+        if self.animation_running and self.current_frames:
+            index, _ = self.frame_clock.advance()
+            self.frame_index = index % len(self.current_frames)
 
-            self.canvas_frame.configure(bg='#abcdef')
-            self.canvas.configure(bg='#abcdef')
+            # 更新画布上的图像（帧未变化时不发送命令）
+            self.renderer.show(self.current_frames[self.frame_index])
+            delay = self.frame_clock.delay_ms()
 
+        self.renderer.end_tick()
+        return delay
 
-        # 使用after_idle避免动画阻塞
-        self.root.after_idle(lambda: self.root.after(50, self.update_animation))
+    def update_animation(self):
+        """专用的动画更新函数：落后时跳帧而不是放慢"""
+        self.animation_job = None
+        if not self.animation_running:
+            return
+        delay = self.power.frame_delay(self.render_frame())
+        if delay is None:
+            # 窗口不可见：暂停，直到 wake() 重新启动
+            return
+
+        # 下一次回调对准下一帧的截止时间
+        self.animation_job = self.event_loop.call_later(delay / 1000, self.update_animation)
 
     def update_behavior(self):
         """行为更新函数，与动画更新分离"""
+        self.behavior_job = None
+        if not self.animation_running:
+            return
+        # 显示器的分辨率或布局变化不会触发这只桌宠窗口的事件，定期重新读取屏幕尺寸（拖动时不读）
         if not self.is_dragging:
-            current_time = time.time()
+            self.renderer.check_screen_size()
+        delay = self.step_behavior()
+        # 对齐到行为间隔的整数倍，多只桌宠的行为步进合并到同一次唤醒
+        self.behavior_job = self.event_loop.call_at(self.event_loop.aligned(delay, BEHAVIOR_INTERVAL),
+                                                    self.update_behavior)
+
+    def wake(self):
+        """立即按全速重新调度动画和行为（从省电状态恢复或用户交互时）"""
+        if not self.animation_running:
+            return
+        self.event_loop.cancel(self.animation_job)
+        self.event_loop.cancel(self.behavior_job)
+        self.update_animation()
+        self.update_behavior()
+
+    def step_behavior(self):
+        """推进一次行为：到时间就切换状态，并按状态移动，返回距下一次步进的秒数
+
+        不需要移动时（唱歌，或处于省电状态）直接睡到下一次切换状态的时间。
+        """
+        active = self.power.mode() == ACTIVE
+        if not self.is_dragging:
+            current_time = time.monotonic()
             if current_time - self.last_state_change > self.state_change_time:
-                all_states = ["walk", "dance", "sing"]
+                all_states = list(BEHAVIOR_STATES)
                 possible_states = [s for s in all_states if s != self.state]
                 if not possible_states:
                     possible_states = all_states
@@ -177,178 +258,353 @@ class DesktopPet:
                 self.state = random.choice(possible_states)
                 self.last_state_change = current_time
 
-                # if self.state == "idle":
-                #     self.current_frames = self.idle_frames
-                if self.state == "walk":
-                    self.current_frames = self.walk_frames
-                elif self.state == "dance":
-                    self.current_frames = self.dance_frames
-                elif self.state == "sing":
-                    self.current_frames = self.sing_frames
-                self.frame_index = 0
-
-            if self.state == "walk":
+                self.play_animation(self.state)
+
+            if active and self.state == "walk":
                 self.move_randomly()
-            if self.state == "dance":
+            if active and self.state == "dance":
                 self.dance_randomly()
 
-        self.root.after(100, self.update_behavior)
+        if self.is_dragging or (active and self.state in ("walk", "dance")):
+            return BEHAVIOR_INTERVAL
+        return max(BEHAVIOR_INTERVAL, self.last_state_change + self.state_change_time - time.monotonic())
 
     def move_randomly(self):
-        self.x += random.randint(-50, 50)
+        self.x += random.randint(-WALK_STEP, WALK_STEP)
         # self.y += random.randint(-10, 10)
         # 确保宠物在屏幕内
-        screen_width = self.root.winfo_screenwidth()
-        screen_height = self.root.winfo_screenheight()
-        self.x = max(0, min(screen_width - 300, self.x))
-        self.y = max(0, min(screen_height - 300, self.y))
-        self.root.geometry(f"450x450+{self.x}+{self.y}")
+        self.x, self.y = self.clamp_position(self.x, self.y)
+        self.renderer.move(self.x, self.y)
 
     def dance_randomly(self):
-        self.x += random.randint(-10, 10)
-        self.y += random.randint(-10, 10)
+        self.x += random.randint(-DANCE_STEP, DANCE_STEP)
+        self.y += random.randint(-DANCE_STEP, DANCE_STEP)
         # 确保宠物在屏幕内
-        screen_width = self.root.winfo_screenwidth()
-        screen_height = self.root.winfo_screenheight()
-        self.x = max(0, min(screen_width - 300, self.x))
-        self.y = max(0, min(screen_height - 300, self.y))
-        self.root.geometry(f"450x450+{self.x}+{self.y}")
+        self.x, self.y = self.clamp_position(self.x, self.y)
+        self.renderer.move(self.x, self.y)
 
     def on_click(self, event):
-        all_states = ["walk", "dance", "sing"]
+        all_states = list(BEHAVIOR_STATES)
         possible_states = [state for state in all_states if state != self.state]
         if not possible_states:
             possible_states = all_states
 
         new_state = random.choice(possible_states)
         self.state = new_state
-
-        # if self.state == "idle":
-        #     self.current_frames = self.idle_frames
-        if self.state == "walk":
-            self.current_frames = self.walk_frames
-        elif self.state == "dance":
-            self.current_frames = self.dance_frames
-        elif self.state == "sing":
-            self.current_frames = self.sing_frames
-
-        self.frame_index = 0
+        self.play_animation(self.state)
+        # 新状态可能需要移动，行为循环不能继续睡到下一次切换
+        self.wake()
 
     def on_drag(self, event):
         if not self.is_dragging:
             self.is_dragging = True
             self.pre_drag_state = self.state
-            self.drag_start_time = time.time()
-            self.current_frames = self.crazy_frames
-            self.frame_index = 0
-            self.drag_sound.play()
+            self.drag_start_time = time.monotonic()
+            self.play_animation("crazy", start=self.drag_start_time)
+            self.audio.play("drag")
 
-        posX = event.x_root - 225
-        posY = event.y_root - 225
+        # 鼠标位于帧的中心
+        posX = event.x_root - self.frame_size[0] // 2
+        posY = event.y_root - self.frame_size[1] // 2
 
         # 确保窗口在屏幕内
-        screen_width = self.root.winfo_screenwidth()
-        screen_height = self.root.winfo_screenheight()
-        posX = max(0, min(screen_width - 300, posX))
-        posY = max(0, min(screen_height - 300, posY))
-        self.x = int(posX)
-        self.y = int(posY)
+        self.x, self.y = self.clamp_position(posX, posY)
 
-        self.root.geometry(f"450x450+{self.x}+{self.y}")
+        self.renderer.move(self.x, self.y)
 
     def on_release(self, event):
         if self.is_dragging:
             self.is_dragging = False
-            self.drag_sound.fadeout(1)
+            self.audio.fadeout("drag", 1)
 
             if self.pre_drag_state:
                 self.state = self.pre_drag_state
-
-                # if self.state == "idle":
-                #     self.current_frames = self.idle_frames
-                if self.state == "walk":
-                    self.current_frames = self.walk_frames
-                elif self.state == "dance":
-                    self.current_frames = self.dance_frames
-                elif self.state == "sing":
-                    self.current_frames = self.sing_frames
-
-                self.frame_index = 0
+                self.play_animation(self.state)
                 self.pre_drag_state = None
+            self.wake()
 
     def show_context_menu(self, event):
         menu = tk.Menu(self.root, tearoff=0)
         menu.add_command(label="删除桌宠", command=self.exit_program)
         # 添加显示图片选项
         menu.add_command(label="“波奇酱是一个可爱的女人捏”", command=self.show_special_image)
+        # 大小（多只桌宠时共享帧库，一起改变）
+        size_menu = tk.Menu(menu, tearoff=0)
+        self.scale_var = tk.DoubleVar(master=self.root, value=self.frame_library.scale)
+        for scale in SCALE_CHOICES:
+            size_menu.add_radiobutton(label=f"{scale:g}x", value=scale, variable=self.scale_var,
+                                      command=lambda scale=scale: self.set_scale(scale))
+        menu.add_cascade(label="大小", menu=size_menu)
+        # 安装了多个桌宠包时可以切换
+        packs = installed_packs(self.base_path)
+        if len(packs) > 1:
+            pack_menu = tk.Menu(menu, tearoff=0)
+            current = self.frame_library.pack.path if self.frame_library.pack is not None else None
+            self.pack_var = tk.StringVar(master=self.root, value=current)
+            for path in packs:
+                pack_menu.add_radiobutton(label=os.path.splitext(os.path.basename(path))[0],
+                                          value=os.path.abspath(path), variable=self.pack_var,
+                                          command=lambda path=path: self.switch_pack(path))
+            menu.add_cascade(label="切换桌宠", menu=pack_menu)
+        if self.instrumentation is not None:
+            menu.add_command(label="性能统计", command=lambda: self.instrumentation.show_window(self.root, self.event_loop))
 
         menu.post(event.x_root, event.y_root)
 
+    def set_scale(self, scale):
+        """切换桌宠大小：立即显示最接近的预生成尺寸，准确尺寸在后台生成后替换"""
+        self.frame_library.set_scale(scale)
+        self.scale = scale
+        self.render_frame()
+
+    def switch_pack(self, path):
+        """换成另一个桌宠包（多只桌宠时共享帧库，一起切换），只读取接下来要显示的帧"""
+        current = self.frame_library.pack
+        if current is not None and current.path == os.path.abspath(path):
+            return
+        pack = open_pack(path)
+        if pack is None:
+            return
+        self.frame_library.use_pack(pack)
+        register_audio(self.audio, pack, self.base_path)
+        self.popup_images.prefetch(self.special_image(), self.image_config["image_size"])
+        self.render_frame()
+
     def exit_program(self):
         self.animation_running = False
+        if self.manager is not None:
+            # 多只桌宠时只移除这一只
+            self.manager.remove_pet(self)
+            return
+        self.close()
         self.root.destroy()
         sys.exit(0)
 
+    def close(self):
+        """释放这只桌宠独占的资源（共享的帧库和音频由 PetManager 释放）"""
+        self.animation_running = False
+        self.event_loop.cancel(self.animation_job)
+        self.event_loop.cancel(self.behavior_job)
+        self.renderer.close()
+        release_shared(self.popup_images if self.owns_popup_images else None,
+                       self.audio if self.owns_audio else None,
+                       self.frame_library if self.owns_frame_library else None,
+                       self.event_loop if self.owns_event_loop else None)
+
+    def special_image(self):
+        """弹窗图片：image_config 改成了另一个存在的文件时用它，否则当前桌宠包中有时从包中读取"""
+        image_path = self.image_config["image_path"]
+        path = os.path.join(self.base_path, image_path)
+        pack = self.frame_library.pack
+        if pack is not None and (image_path == IMAGE_FILES["special"] or not os.path.exists(path)):
+            entry = pack.image("special")
+            if entry is not None:
+                return entry
+        return path
+
     def show_special_image(self):
-        """显示特殊图片"""
-        try:
-            # 创建新窗口
-            image_window = tk.Toplevel(self.root)
-            image_window.title("Man Fuck U")
-            image_window.attributes("-topmost", True)  # 保持在最前面
+        """显示特殊图片（后台加载，缓存命中时立即显示）"""
+        self.popup_images.get(self.special_image(), self.image_config["image_size"],
+                              self.open_image_window, self.show_image_error)
+
+    def open_image_window(self, photo):
+        # 创建新窗口
+        image_window = tk.Toplevel(self.root)
+        image_window.title("Man Fuck U")
+        image_window.attributes("-topmost", True)  # 保持在最前面
+
+        # 创建标签显示图片
+        img_label = tk.Label(image_window, image=photo)
+        img_label.image = photo  # 保持引用
+        img_label.pack(padx=10, pady=10)
+
+        # 播放音效
+        display_time = self.image_config["display_time"]
+        self.audio.play_stream("xi", maxtime=display_time)
+
+        # 自动关闭定时器
+        self.event_loop.call_later(display_time / 1000, image_window.destroy)
+
+    def show_image_error(self, e):
+        print(f"显示图片失败: {e}")
+        # 显示错误消息
+        error_window = tk.Toplevel(self.root)
+        error_window.title("错误")
+        error_label = tk.Label(
+            error_window,
+            text=f"无法加载图片: {self.special_image()}\n{e}",
+            fg="red",
+            padx=20,
+            pady=20
+        )
+        error_label.pack()
+        self.event_loop.call_later(3, error_window.destroy)
+
+
+def resource_base_path():
+    """资源所在目录：打包后为 _MEIPASS，否则为脚本所在目录"""
+    if getattr(sys, 'frozen', False):
+        return sys._MEIPASS
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def create_frame_cache(cache_dir=None):
+    """帧缓存：用户缓存目录可写，构建时预先生成的帧（asset_pipeline.py）只读"""
+    return FrameCache(cache_dir, extra_dirs=[os.path.join(resource_base_path(), BAKED_FRAMES_DIR)])
 
-            # 加载并调整图片大小
-            img = Image.open("images/special.bmp")
-            img = img.convert("RGBA")  # 确保有alpha通道
 
-            # 按比例调整大小
-            target_size = self.image_config["image_size"]
-            img_ratio = img.width / img.height
-            target_ratio = target_size[0] / target_size[1]
+def default_sheet_path():
+    """构建时生成的精灵图集，存在时代替逐个解码GIF"""
+    path = os.path.join(resource_base_path(), BAKED_SHEET)
+    return path if os.path.exists(path) else None
 
-            if img_ratio > target_ratio:
-                # 宽度是限制因素
-                new_width = target_size[0]
-                new_height = int(target_size[0] / img_ratio)
-            else:
-                # 高度是限制因素
-                new_height = target_size[1]
-                new_width = int(target_size[1] * img_ratio)
 
-            img = img.resize((new_width, new_height), Image.LANCZOS)
+def default_pack_path():
+    """随程序安装的默认桌宠包，存在时代替图集和GIF"""
+    path = os.path.join(resource_base_path(), DEFAULT_PACK)
+    return path if os.path.exists(path) else None
 
-            # 创建PhotoImage
-            photo = ImageTk.PhotoImage(img)
 
-            # 创建标签显示图片
-            img_label = tk.Label(image_window, image=photo)
-            img_label.image = photo  # 保持引用
-            img_label.pack(padx=10, pady=10)
+def open_pack(path):
+    """打开桌宠包，失败时返回None以回退到图集或GIF"""
+    if not path:
+        return None
+    try:
+        return PetPack(path)
+    except (OSError, ValueError) as e:
+        print(f"桌宠包加载错误: {e}")
+        return None
 
-            # 播放音效
-            self.xi_sound.play(0, 10000)
 
-            # 自动关闭定时器
-            image_window.after(self.image_config["display_time"], image_window.destroy)
+def create_audio(event_loop, enabled=True, pack=None, base_path=None):
+    """创建音频引擎并登记桌宠用到的声音，限时播放的定时器登记到事件循环"""
+    audio = AudioEngine(schedule=lambda ms, callback: event_loop.call_later(ms / 1000, callback),
+                        enabled=enabled)
+    register_audio(audio, pack, base_path)
+    return audio
 
 
+def register_audio(audio, pack=None, base_path=None):
+    """登记声音：桌宠包中有的从包中读取，其余读取 base_path/sounds/ 下的文件"""
+    base_path = base_path or resource_base_path()
+    for name, path in SOUND_FILES.items():
+        audio.preload(name, (pack.sound(name) if pack is not None else None) or os.path.join(base_path, path))
+    for name, path in STREAM_FILES.items():
+        audio.register_stream(name, (pack.sound(name) if pack is not None else None) or os.path.join(base_path, path))
+
+
+def warm_frame_cache(frame_cache, decoder, sizes=None):
+    """预先处理所有动画（帧金字塔的每一级）并写入帧缓存，未命中的动画一起并行处理"""
+    sizes = sizes or level_sizes()
+    paths = {state: os.path.join(resource_base_path(), path) for state, path in ANIMATION_FILES.items()}
+    start = time.perf_counter()
+    for size in sizes:
+        try:
+            keys = frame_cache.warm(list(paths.values()), decoder, (size, size))
         except Exception as e:
-            print(f"显示图片失败: {e}")
-            # 显示错误消息
-            error_window = tk.Toplevel(self.root)
-            error_window.title("错误")
-            error_label = tk.Label(
-                error_window,
-                text=f"无法加载图片: {self.image_config['image_path']}\n{e}",
-                fg="red",
-                padx=20,
-                pady=20
-            )
-            error_label.pack()
-            error_window.after(3000, error_window.destroy)
+            print(f"预热失败: {e}")
+            return
+        for state, path in paths.items():
+            if path in keys:
+                print(f"{state}: {keys[path]}")
+    print(f"预热完成 ({decoder.max_workers} 进程), 耗时 {(time.perf_counter() - start) * 1000:.1f}ms")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Bocchi 桌面宠物")
+    parser.add_argument("--warm-cache", action="store_true", help="预先生成帧缓存后退出")
+    parser.add_argument("--clear-cache", action="store_true", help="清空帧缓存后退出")
+    parser.add_argument("--cache-dir", default=None, help="帧缓存目录")
+    parser.add_argument("--workers", type=int, default=None, help="GIF预处理进程数（默认为CPU核数）")
+    parser.add_argument("--pack", default=None, help="使用 pet_pack.py 生成的桌宠包（默认为随程序安装的包）")
+    parser.add_argument("--sheet", default=None, help="使用 sprite_sheet.py 生成的精灵图集代替GIF")
+    parser.add_argument("--frame-budget", type=float, default=DEFAULT_BUDGET / (1024 * 1024),
+                        help="动画帧的内存预算（MB）")
+    parser.add_argument("--scale", type=float, default=1.0, help="桌宠大小（1为120像素）")
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                        help="用户无操作多少秒后降低帧率（0为不检测）")
+    parser.add_argument("--delta-frames", action="store_true",
+                        help="增量帧模式：每个tick只把变化的矩形复制到显示图像上")
+    parser.add_argument("--dedup-threshold", type=float, default=0,
+                        help="近似重复帧的合并阈值（各通道平均差异0-255，0为只合并完全相同的帧）")
+    parser.add_argument("--mute", action="store_true", help="不初始化音频")
+    parser.add_argument("--pets", type=int, default=1, help="同时运行的桌宠数量")
+    parser.add_argument("--startup-probe", action="store_true", help="显示出第一帧后立即退出（build.py 测量冷启动时间）")
+    parser.add_argument("--profile", action="store_true", help="开启回调计时和事件循环延迟统计")
+    parser.add_argument("--profile-out", default=None, help="退出时把统计写入该JSON文件（隐含 --profile）")
+    parser.add_argument("--cprofile-out", default=None, help="退出时导出cProfile结果到该文件（隐含 --profile）")
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
+    # 打包后的程序使用进程池时需要
+    multiprocessing.freeze_support()
+    # 打包后资源都在程序包内，相对路径以它为准
+    if getattr(sys, 'frozen', False):
+        os.chdir(resource_base_path())
+    args = parse_args()
+    # 优先级：指定的桌宠包 > 指定的图集 > 默认桌宠包 > 默认图集 > GIF
+    pack = open_pack(args.pack or (None if args.sheet else default_pack_path()))
+    sheet_path = None if pack is not None else args.sheet or default_sheet_path()
+    frame_cache = create_frame_cache(args.cache_dir)
+    if args.clear_cache or args.warm_cache:
+        if args.clear_cache:
+            print(f"已清除 {frame_cache.clear()} 个缓存文件")
+        if args.warm_cache:
+            decoder = ParallelDecoder(args.workers)
+            warm_frame_cache(frame_cache, decoder)
+            decoder.shutdown()
+        entries = frame_cache.entries()
+        print(f"帧缓存: {len(entries)} 个文件, {frame_cache.total_bytes(entries) / (1024 * 1024):.1f}MB")
+        sys.exit(0)
+
+    instrumentation = None
+    if args.profile or args.profile_out or args.cprofile_out:
+        instrumentation = Instrumentation(cprofile_path=args.cprofile_out)
+
     root = tk.Tk()
-    pet = DesktopPet(root)
-    root.mainloop()
\ No newline at end of file
+    if args.pets > 1:
+        # 多只桌宠：隐藏主窗口，所有桌宠共享帧库、音频和同一个事件循环
+        root.withdraw()
+        event_loop = EventLoop(root)
+        library = FrameLibrary(root, frame_cache=frame_cache, decode_workers=args.workers,
+                               sheet_path=sheet_path, frame_budget=int(args.frame_budget * 1024 * 1024),
+                               scale=args.scale, event_loop=event_loop, delta_frames=args.delta_frames,
+                               dedup_threshold=args.dedup_threshold, pack=pack,
+                               base_path=resource_base_path())
+        manager = PetManager(root, DesktopPet, library,
+                             create_audio(event_loop, not args.mute, pack, resource_base_path()), event_loop)
+        for _ in range(args.pets):
+            manager.add_pet(instrumentation=instrumentation, idle_timeout=args.idle_timeout)
+        try:
+            root.mainloop()
+        finally:
+            manager.shutdown()
+            if instrumentation is not None:
+                instrumentation.dump(args.profile_out)
+        sys.exit(0)
+
+    pet = DesktopPet(
+        root,
+        frame_cache=frame_cache,
+        decode_workers=args.workers,
+        sheet_path=sheet_path,
+        frame_budget=int(args.frame_budget * 1024 * 1024),
+        scale=args.scale,
+        idle_timeout=args.idle_timeout,
+        delta_frames=args.delta_frames,
+        dedup_threshold=args.dedup_threshold,
+        pack=pack,
+        audio_enabled=not args.mute,
+        instrumentation=instrumentation,
+    )
+    if args.startup_probe:
+        root.update()
+        pet.close()
+        root.destroy()
+        sys.exit(0)
+    try:
+        root.mainloop()
+    finally:
+        if instrumentation is not None:
+            instrumentation.dump(args.profile_out)
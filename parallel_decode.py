@@ -0,0 +1,76 @@
+"""多进程GIF预处理
+
+GIF本身只能顺序解码，因此主进程只负责读出每一帧的原始数据，
+抠图和LANCZOS缩放这些耗时的Pillow运算分发到进程池中并行执行，
+结果以RGBA字节缓冲区返回，主线程只需创建PhotoImage。
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageSequence
+
+from gif_frames import process_frame
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def _process_frame_job(frame, global_palette, target_size, resample):
+    """子进程任务：处理一帧并返回 (尺寸, RGBA字节, 帧时长)"""
+    result = process_frame(frame, global_palette, target_size, resample)
+    return result.size, result.tobytes(), result.info["duration"]
+
+
+def _frame_from_buffer(size, data, duration):
+    frame = Image.frombuffer("RGBA", size, data, "raw", "RGBA", 0, 1)
+    frame.info["duration"] = duration
+    return frame
+
+
+class ParallelDecoder:
+    def __init__(self, max_workers=None):
+        self.max_workers = max(1, max_workers or default_workers())
+        self._executor = None
+
+    def _get_executor(self):
+        # 进程池按需创建，缓存全部命中时不必承担启动开销
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def decode_many(self, paths, target_size=(120, 120), resample=Image.LANCZOS):
+        """并行处理多个GIF的所有帧，返回 {路径: RGBA图像列表}，帧顺序与原文件一致"""
+        if self.max_workers == 1:
+            # 单进程时直接在本进程处理，省去序列化开销
+            results = {}
+            for path in paths:
+                gif = Image.open(path)
+                global_palette = gif.getpalette()
+                results[path] = [process_frame(frame, global_palette, target_size, resample)
+                                 for frame in ImageSequence.Iterator(gif)]
+            return results
+
+        executor = self._get_executor()
+        pending = {}
+        for path in paths:
+            gif = Image.open(path)
+            global_palette = gif.getpalette()
+            pending[path] = [
+                executor.submit(_process_frame_job, frame.copy(), global_palette, target_size, resample)
+                for frame in ImageSequence.Iterator(gif)
+            ]
+
+        return {
+            path: [_frame_from_buffer(*future.result()) for future in futures]
+            for path, futures in pending.items()
+        }
+
+    def decode_gif(self, path, target_size=(120, 120), resample=Image.LANCZOS):
+        """并行处理单个GIF，接口与 gif_frames.decode_gif 相同"""
+        return self.decode_many([path], target_size, resample)[path]
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,27 @@
+"""桌宠资源清单"""
+
+# 各状态对应的GIF文件
+ANIMATION_FILES = {
+    "walk": "Bochhi/DeskPets/(4).gif",
+    "dance": "Bochhi/DeskPets/(3).gif",
+    "sing": "Bochhi/DeskPets/(1).gif",
+    "crazy": "Bochhi/DeskPets/(2).gif",
+}
+
+# 构建时预先处理好的运行时帧（由 asset_pipeline.py 生成，格式同 frame_cache）
+BAKED_FRAMES_DIR = "baked_frames"
+
+# 预先生成的精灵图集（sprite_sheet.py），存在时代替逐个解码GIF
+BAKED_SHEET = BAKED_FRAMES_DIR + "/pet_sheet.png"
+
+# 短音效（整段解码进内存）和流式播放的长曲目
+SOUND_FILES = {"drag": "sounds/结束乐队-ラブソングが歌えない.wav"}
+STREAM_FILES = {"xi": "sounds/結束バンド - 転がる岩、君に朝が降る (翻转岩石，晨光洒落你身).mp3"}
+
+# 右键菜单弹出的图片
+IMAGE_FILES = {"special": "images/special.bmp"}
+
+# 桌宠包（由 pet_pack.py 生成，包含以上全部资源）所在目录；build.py 只打包这个目录
+PACK_DIR = "pets"
+PACK_EXT = ".petpack"
+DEFAULT_PACK = PACK_DIR + "/bocchi" + PACK_EXT
@@ -0,0 +1,16 @@
+"""桌宠行为参数（DesktopPet 和离线的批量行为模拟共用）"""
+
+# 会随机切换的状态（crazy 只在拖动时出现）
+BEHAVIOR_STATES = ("walk", "dance", "sing")
+
+# 每次行为步进的随机位移范围（像素）
+WALK_STEP = 50
+DANCE_STEP = 10
+
+# 离线模拟（behavior_sim.py）中位置距屏幕右/下边缘至少保留的距离；
+# DesktopPet 按帧的不透明区域限制位置，不再使用它
+EDGE_MARGIN = 300
+
+# 状态保持时间（秒）和行为步进间隔（秒）
+STATE_CHANGE_TIME = 5
+BEHAVIOR_INTERVAL = 0.1
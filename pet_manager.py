@@ -0,0 +1,68 @@
+"""多只桌宠的统一管理
+
+所有桌宠共享一个帧库（同一批PhotoImage）、一个音频引擎、一个弹窗图片缓存和一个事件循环（event_loop.py）：
+每只桌宠的动画帧和行为步进都登记在同一个事件循环里，同一时刻到期的任务在一次唤醒中批量执行，
+Tk上始终只有一个定时器，而不是每只桌宠各自维持两条定时器链。
+行为步进对齐到统一的间隔，所有桌宠一起醒来；不可见的桌宠暂停动画，空闲的桌宠按各自的省电模式降低频率。
+"""
+import random
+import tkinter as tk
+
+from popup_images import PopupImageCache
+
+
+def release_shared(popup_images=None, audio=None, frame_library=None, event_loop=None):
+    """按固定顺序释放桌宠的共享资源（传入None的跳过），PetManager 和单独运行的桌宠都经过这里
+
+    音频先于帧库关闭：帧库会关闭桌宠包，流式播放的曲目可能还在从包中读取。
+    """
+    if popup_images is not None:
+        popup_images.shutdown()
+    if audio is not None:
+        audio.shutdown()
+    if frame_library is not None:
+        frame_library.shutdown()
+    if event_loop is not None:
+        event_loop.close()
+
+
+class PetManager:
+    def __init__(self, root, pet_class, frame_library, audio, event_loop):
+        self.root = root
+        self.pet_class = pet_class
+        self.frame_library = frame_library
+        self.audio = audio
+        self.event_loop = event_loop
+        # 弹窗图片只解码缩放一次，所有桌宠共用
+        self.popup_images = PopupImageCache(root, event_loop)
+        self.pets = []
+
+    def add_pet(self, x=None, y=None, **kwargs):
+        """在新的顶层窗口中创建一只桌宠，位置默认随机"""
+        window = tk.Toplevel(self.root)
+        pet = self.pet_class(window, frame_library=self.frame_library, audio=self.audio,
+                             manager=self, event_loop=self.event_loop, popup_images=self.popup_images, **kwargs)
+        if not self.pets:
+            self.popup_images.prefetch(pet.special_image(), pet.image_config["image_size"])
+        screen_width, screen_height = pet.renderer.screen_size
+        left, top, right, bottom = pet.sprite_box
+        pet.x = x if x is not None else random.randint(-left, max(-left, screen_width - right))
+        pet.y = y if y is not None else random.randint(-top, max(-top, screen_height - bottom))
+        pet.renderer.move(pet.x, pet.y)
+
+        self.pets.append(pet)
+        return pet
+
+    def remove_pet(self, pet):
+        if pet in self.pets:
+            self.pets.remove(pet)
+        pet.close()
+        pet.root.destroy()
+        if not self.pets:
+            self.root.quit()
+
+    def shutdown(self):
+        for pet in self.pets:
+            pet.close()
+        self.pets.clear()
+        release_shared(self.popup_images, self.audio, self.frame_library, self.event_loop)
@@ -0,0 +1,384 @@
+"""桌宠包（pet pack）
+
+把一只桌宠的全部资源（各状态在帧金字塔每一级的帧、音效、曲目和弹窗图片）打包成一个文件：
+
+    文件头 | JSON索引 | 数据区
+
+文件头是魔数、版本号和索引长度；索引记录每个尺寸下每个状态的帧在数据区中的偏移、长度、
+帧尺寸、时长和内容哈希，以及每个声音、图片的偏移和长度。帧是zlib压缩的RGBA数据，
+先合并连续的重复帧，内容相同的帧（包括不同状态、不同尺寸之间）只保存一份。
+
+运行时用mmap映射整个文件，打开时只解析索引；某个状态的帧在第一次显示时才从映射中读出解压，
+声音和图片也通过映射上的文件对象读取。切换到另一只桌宠只需要读取它要显示的那些帧。
+
+用法: python pet_pack.py [-o pets/bocchi.petpack] [--name bocchi] [--sizes 60 120 ...] [--workers N]
+      python pet_pack.py --list pets/bocchi.petpack
+"""
+import argparse
+import io
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+
+from PIL import Image
+
+from frame_pyramid import BASE_SIZE, level_sizes
+from gif_frames import alpha_bounds, frame_digest, frame_duration, merge_duplicate_frames
+from parallel_decode import ParallelDecoder
+from pet_assets import ANIMATION_FILES, DEFAULT_PACK, IMAGE_FILES, PACK_DIR, PACK_EXT, SOUND_FILES, STREAM_FILES
+
+PACK_MAGIC = b"BPETPACK"
+PACK_VERSION = 1
+# 魔数、版本号、索引长度
+HEADER = struct.Struct("<8sII")
+# 数据区按此对齐
+ALIGNMENT = 16
+COMPRESS_LEVEL = 6
+
+
+def align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def build_pack(pack_path, levels, sounds=None, streams=None, images=None, name=None, dedup_threshold=0):
+    """写入桌宠包，返回索引
+
+    levels 为 {帧边长: {状态: RGBA帧列表}}，sounds/streams/images 为 {名称: 文件路径}。
+    """
+    blobs = []  # 按顺序写入数据区的字节串
+    offsets = {}  # 内容哈希 -> (偏移, 长度)，相同内容只写一次
+    data_size = 0
+
+    def add_blob(digest, data):
+        nonlocal data_size
+        if digest not in offsets:
+            offsets[digest] = (data_size, len(data))
+            blobs.append(data)
+            data_size += len(data)
+        return offsets[digest]
+
+    index = {"version": PACK_VERSION, "name": name or os.path.splitext(os.path.basename(pack_path))[0],
+             "codec": "zlib-rgba", "levels": {}, "dedup": {}, "sounds": {}, "images": {}}
+    for size, animations in sorted(levels.items()):
+        level = index["levels"][str(size)] = {}
+        for state, frames in animations.items():
+            frames, index["dedup"][f"{state}@{size}"] = merge_duplicate_frames(frames, dedup_threshold)
+            entries = []
+            for frame in frames:
+                frame = frame.convert("RGBA")
+                digest = frame_digest(frame)
+                offset, length = add_blob(digest, zlib.compress(frame.tobytes(), COMPRESS_LEVEL))
+                entries.append({"offset": offset, "length": length, "w": frame.width, "h": frame.height,
+                                "duration": frame_duration(frame), "digest": digest})
+            bounds = list(alpha_bounds(frames)) if frames else [0, 0, size, size]
+            level[state] = {"bounds": bounds, "frames": entries}
+
+    for section, files, kind in (("sounds", sounds, "sound"), ("sounds", streams, "stream"),
+                                 ("images", images, "image")):
+        for key, path in (files or {}).items():
+            with open(path, "rb") as f:
+                data = f.read()
+            offset, length = add_blob(f"file:{len(data)}:{zlib.crc32(data)}", data)
+            index[section][key] = {"offset": offset, "length": length, "kind": kind,
+                                   "ext": os.path.splitext(path)[1].lstrip(".").lower()}
+
+    payload = json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    data_start = align(HEADER.size + len(payload))
+    directory = os.path.dirname(pack_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # 先写临时文件再替换，正在运行的桌宠不会读到写了一半的包
+    temp_path = pack_path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(HEADER.pack(PACK_MAGIC, PACK_VERSION, len(payload)))
+        f.write(payload)
+        f.write(b"\0" * (data_start - HEADER.size - len(payload)))
+        for data in blobs:
+            f.write(data)
+    os.replace(temp_path, pack_path)
+    return index
+
+
+def validate_index(index, data_length):
+    """检查索引的结构，以及所有帧、声音和图片都落在数据区内；格式不对时抛出 ValueError"""
+    if not isinstance(index, dict):
+        raise ValueError("索引不是JSON对象")
+    for key in ("levels", "sounds", "images"):
+        if not isinstance(index.get(key), dict):
+            raise ValueError(f"索引中缺少 {key}")
+    if not isinstance(index.get("dedup", {}), dict):
+        raise ValueError("索引中的 dedup 无效")
+
+    def check_blob(info, what):
+        offset, length = info.get("offset"), info.get("length")
+        if not (isinstance(offset, int) and isinstance(length, int)
+                and offset >= 0 and length >= 0 and offset + length <= data_length):
+            raise ValueError(f"{what}: 超出数据区")
+
+    for size, states in index["levels"].items():
+        if not size.isdigit() or not isinstance(states, dict):
+            raise ValueError(f"无效的尺寸: {size}")
+        for state, animation in states.items():
+            what = f"{state}@{size}"
+            if (not isinstance(animation, dict) or not isinstance(animation.get("frames"), list)
+                    or not isinstance(animation.get("bounds"), list) or len(animation["bounds"]) != 4):
+                raise ValueError(f"无效的动画: {what}")
+            for frame in animation["frames"]:
+                if (not isinstance(frame, dict) or not isinstance(frame.get("digest"), str)
+                        or not all(isinstance(frame.get(key), int) for key in ("w", "h", "duration"))):
+                    raise ValueError(f"无效的帧: {what}")
+                check_blob(frame, f"{what} 的帧")
+    for section in ("sounds", "images"):
+        for name, info in index[section].items():
+            if (not isinstance(info, dict) or not isinstance(info.get("ext"), str)
+                    or not isinstance(info.get("kind"), str)):
+                raise ValueError(f"无效的条目: {name}")
+            check_blob(info, name)
+
+
+class PackRegion(io.RawIOBase):
+    """包内一段数据的只读文件对象，直接从映射中读取，不整段复制"""
+
+    def __init__(self, buffer, offset, length):
+        super().__init__()
+        self.buffer = buffer
+        self.offset = offset
+        self.length = length
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, target):
+        count = max(0, min(len(target), self.length - self.position))
+        start = self.offset + self.position
+        target[:count] = self.buffer[start:start + count]
+        self.position += count
+        return count
+
+    def seek(self, position, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            position += self.position
+        elif whence == io.SEEK_END:
+            position += self.length
+        self.position = max(0, position)
+        return self.position
+
+    def tell(self):
+        return self.position
+
+
+class PackEntry:
+    """包内的一个声音或图片，可以像文件路径一样交给 AudioEngine 和 PopupImageCache"""
+
+    def __init__(self, pack, name, info):
+        self.pack = pack
+        self.name = name
+        self.offset = pack.data_start + info["offset"]
+        self.length = info["length"]
+        self.kind = info["kind"]
+        self.ext = info["ext"]
+
+    def open(self):
+        """返回一个新的只读文件对象（各自独立的读取位置）"""
+        return io.BufferedReader(PackRegion(self.pack.map, self.offset, self.length))
+
+    @property
+    def cache_id(self):
+        """用于缓存的标识，包文件变化后随之变化"""
+        return f"{self.pack.path}#{self.name}", self.pack.mtime_ns, self.length
+
+    def __str__(self):
+        return f"{self.pack.path}#{self.name}"
+
+
+class PackedAnimation:
+    """帧存储中由桌宠包提供的一组帧（接口同 frame_store.CompactAnimation）
+
+    像素留在映射的文件中，不计入帧存储的内存占用；展开时才读取解压。
+    """
+    __slots__ = ("pack", "state", "frame_size", "size", "digests")
+    nbytes = 0
+
+    def __init__(self, pack, state, frame_size):
+        self.pack = pack
+        self.state = state
+        self.frame_size = frame_size
+        entries = pack.entries(state, frame_size)
+        self.size = (entries[0]["w"], entries[0]["h"]) if entries else (0, 0)
+        self.digests = [entry["digest"] for entry in entries]
+
+    def expand(self):
+        return self.pack.frames(self.state, self.frame_size)
+
+
+class PetPack:
+    """以mmap打开的桌宠包，只在需要时读取帧、声音和图片
+
+    文件损坏或不是桌宠包时抛出 ValueError（打不开文件时是 OSError）。
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.file = open(self.path, "rb")
+        if os.fstat(self.file.fileno()).st_size < HEADER.size:
+            self.file.close()
+            raise ValueError(f"不是桌宠包（文件太短）: {path}")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            self.file.close()
+            raise
+        try:
+            magic, version, index_length = HEADER.unpack_from(self.map, 0)
+            if magic != PACK_MAGIC:
+                raise ValueError("文件头不是桌宠包")
+            if version != PACK_VERSION:
+                raise ValueError(f"不支持的版本: {version}")
+            if HEADER.size + index_length > len(self.map):
+                raise ValueError("索引不完整")
+            self.index = json.loads(self.map[HEADER.size:HEADER.size + index_length].decode("utf-8"))
+            self.data_start = align(HEADER.size + index_length)
+            validate_index(self.index, max(0, len(self.map) - self.data_start))
+        except ValueError as e:
+            self.close()
+            raise ValueError(f"桌宠包无效: {path} ({e})") from e
+        self.mtime_ns = os.fstat(self.file.fileno()).st_mtime_ns
+        # 实际从映射中读出的帧数据字节数（压缩后）
+        self.bytes_read = 0
+
+    @property
+    def name(self):
+        return self.index.get("name") or os.path.splitext(os.path.basename(self.path))[0]
+
+    def sizes(self):
+        return sorted(int(size) for size in self.index["levels"])
+
+    def states(self, size):
+        return list(self.index["levels"].get(str(size), {}))
+
+    def entries(self, state, size):
+        return self.index["levels"][str(size)][state]["frames"]
+
+    def durations(self, state, size):
+        return [entry["duration"] for entry in self.entries(state, size)]
+
+    def bounds(self, state, size):
+        return tuple(self.index["levels"][str(size)][state]["bounds"])
+
+    def frames(self, state, size):
+        """读出并解压一个状态的帧，返回PIL图像列表（可在后台线程调用）"""
+        frames = []
+        for entry in self.entries(state, size):
+            start = self.data_start + entry["offset"]
+            self.bytes_read += entry["length"]
+            data = zlib.decompress(self.map[start:start + entry["length"]])
+            image = Image.frombuffer("RGBA", (entry["w"], entry["h"]), data, "raw", "RGBA", 0, 1)
+            image.info["duration"] = entry["duration"]
+            frames.append(image)
+        return frames
+
+    def sound(self, name):
+        info = self.index["sounds"].get(name)
+        return PackEntry(self, name, info) if info else None
+
+    def sounds(self):
+        return [PackEntry(self, name, info) for name, info in self.index["sounds"].items()]
+
+    def image(self, name):
+        info = self.index["images"].get(name)
+        return PackEntry(self, name, info) if info else None
+
+    def close(self):
+        """关闭映射；从包中流式播放的声音必须先停止（AudioEngine.shutdown 之后再调用）"""
+        self.map.close()
+        self.file.close()
+
+
+def installed_packs(base_path):
+    """base_path/pets 下所有的桌宠包路径"""
+    directory = os.path.join(base_path, PACK_DIR)
+    try:
+        names = sorted(os.listdir(directory))
+    except OSError:
+        return []
+    return [os.path.join(directory, name) for name in names if name.endswith(PACK_EXT)]
+
+
+def decode_levels(sizes, workers=None):
+    """按当前目录结构解码所有状态的GIF，返回 {帧边长: {状态: 帧列表}}"""
+    decoder = ParallelDecoder(workers)
+    try:
+        levels = {}
+        for size in sizes:
+            decoded = decoder.decode_many(list(ANIMATION_FILES.values()), (size, size))
+            levels[size] = {state: decoded[path] for state, path in ANIMATION_FILES.items()}
+        return levels
+    finally:
+        decoder.shutdown()
+
+
+def build_default_pack(pack_path=DEFAULT_PACK, sizes=None, workers=None, name=None, dedup_threshold=0):
+    """用当前目录下的GIF、声音和图片生成桌宠包"""
+    levels = decode_levels(sizes or level_sizes(), workers)
+    missing = [state for animations in levels.values() for state, frames in animations.items() if not frames]
+    if missing:
+        raise ValueError(f"无法预处理GIF: {', '.join(sorted(set(missing)))}")
+    # 声音和图片缺失时只是不打包，运行时相应的功能静默跳过
+    files = []
+    for group in (SOUND_FILES, STREAM_FILES, IMAGE_FILES):
+        files.append({key: path for key, path in group.items() if os.path.exists(path)})
+        for path in set(group.values()) - set(files[-1].values()):
+            print(f"缺少资源文件，不打包: {path}")
+    return build_pack(pack_path, levels, *files, name, dedup_threshold)
+
+
+def describe(pack_path):
+    pack = PetPack(pack_path)
+    try:
+        print(f"{pack.name}: {os.path.getsize(pack_path) / 1024:.1f}KB, 尺寸 {pack.sizes()}")
+        base = BASE_SIZE if BASE_SIZE in pack.sizes() else pack.sizes()[0]
+        for state in pack.states(base):
+            print(f"  {state}@{base}: {len(pack.entries(state, base))} 帧, "
+                  f"{sum(pack.durations(state, base))}ms")
+        for section in ("sounds", "images"):
+            for key, info in pack.index[section].items():
+                print(f"  {info['kind']} {key}: {info['length'] / 1024:.1f}KB")
+    finally:
+        pack.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把当前目录下的桌宠资源打包为一个桌宠包")
+    parser.add_argument("-o", "--output", default=DEFAULT_PACK, help="输出的桌宠包路径")
+    parser.add_argument("--name", default=None, help="桌宠名称（默认取文件名）")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None, help="打包的帧边长（默认为帧金字塔的所有级别）")
+    parser.add_argument("--workers", type=int, default=None, help="预处理进程数")
+    parser.add_argument("--dedup-threshold", type=float, default=0,
+                        help="近似重复帧的合并阈值（各通道平均差异0-255，0为只合并完全相同的帧）")
+    parser.add_argument("--list", metavar="PACK", default=None, help="列出桌宠包的内容后退出")
+    args = parser.parse_args()
+
+    if args.list:
+        describe(args.list)
+        return
+
+    start = time.perf_counter()
+    index = build_default_pack(args.output, args.sizes, args.workers, args.name, args.dedup_threshold)
+    for key, stats in index["dedup"].items():
+        if stats["kept"] < stats["frames"]:
+            print(f"{key}: {stats['kept']} 帧 (原 {stats['frames']} 帧)")
+    raw_size = sum(os.path.getsize(path) for files in (ANIMATION_FILES, SOUND_FILES, STREAM_FILES, IMAGE_FILES)
+                   for path in files.values() if os.path.exists(path))
+    print(f"桌宠包已写入 {args.output} ({os.path.getsize(args.output) / 1024:.1f}KB, "
+          f"原始资源 {raw_size / 1024:.1f}KB), 耗时 {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""带脏标记的渲染层
+
+所有改变画面的Tk命令都经过这里：只有显示的图像或窗口位置真正变化时才发送，
+并统计每个动画tick实际发出的Tcl调用数，方便确认静止时空闲CPU接近零。
+
+窗口移动会合并：每个显示帧最多应用一次位置变化，以最新的位置为准，
+并且只发送位置（"+x+y"），不重复发送窗口尺寸。
+
+增量模式下帧以脏矩形的形式复制到这只桌宠唯一的显示图像上（delta_frames.py、图集的 delta），
+bytes_moved 统计每次换帧实际复制（或整帧换上）的RGBA字节数，用于比较两种模式。
+
+延迟的移动登记到桌宠的事件循环（event_loop.py），不单独使用 after()。
+
+窗口只覆盖帧中不透明像素的包围盒（set_bounds），而不是整块画布：
+position 是整帧左上角的屏幕坐标，窗口实际位于 position 加上包围盒原点处。
+"""
+import time
+from collections import deque
+
+from delta_frames import DeltaDisplay, DeltaFrame
+from event_loop import EventLoop
+from sprite_sheet import SheetFrame
+
+# 一个显示帧的时长（按60Hz计算），单位秒
+FRAME_INTERVAL = 1 / 60
+# 行为步进时最多每隔这么多秒重新读取一次屏幕尺寸（分辨率或显示器布局变化不会改变桌宠窗口的尺寸）
+SCREEN_REFRESH_INTERVAL = 5.0
+
+
+class PetRenderer:
+    def __init__(self, root, canvas, image_item, image=None, position=None, history=200, event_loop=None):
+        self.root = root
+        self.event_loop = event_loop or EventLoop(root)
+        self.canvas = canvas
+        self.image_item = image_item
+
+        # 当前已发送给Tk的状态
+        self.current_image = image
+        self.current_photo = image
+        # 图集帧复制到这只桌宠自己的显示图像上，sheet_shown 是它上面当前的帧
+        self.sheet_display = None
+        self.sheet_shown = None
+        # 增量帧的显示图像
+        self.delta_display = None
+        self.position = position
+        # 当前窗口覆盖的帧内区域 (left, top, right, bottom)
+        self.bounds = None
+
+        # 等待合并应用的窗口位置
+        self.pending_position = None
+        self.flush_job = None
+        self.last_flush = 0.0
+        self.moves_coalesced = 0
+
+        # 缓存屏幕尺寸，只在配置真正变化时刷新（拖动时每次移动都会触发 <Configure>，不查询）：
+        # 窗口重新映射、窗口尺寸被外部改变或位置落到缓存的屏幕之外时，以及行为步进时定期刷新
+        self.screen_queries = 0
+        self.screen_size = None
+        self.screen_checked = 0.0
+        self.refresh_screen_size()
+        self.window_size = None  # 最近一次 <Configure> 报告的窗口尺寸
+        self.requested_size = None  # set_bounds 最近设置的窗口尺寸
+        root.bind("<Configure>", self.on_configure, add="+")
+        root.bind("<Map>", self.on_map, add="+")
+
+        # Tcl调用统计
+        self.tick_calls = 0
+        self.total_calls = 0
+        self.ticks = 0
+        self.calls_history = deque(maxlen=history)
+        self.bytes_moved = 0
+
+    def show(self, image):
+        """显示指定帧（PhotoImage、图集帧或增量帧），与当前帧相同时不发送任何命令"""
+        if image is self.current_image:
+            return False
+        self.current_image = image
+
+        if isinstance(image, SheetFrame):
+            # 图集帧：把区域（增量模式下只有变化的矩形）复制到这只桌宠的显示图像上
+            if self.sheet_display is None:
+                self.sheet_display = image.sheet.new_display(self.root)
+            pixels = image.sheet.blit(image, self.sheet_display, self.sheet_shown)
+            self.sheet_shown = image
+            self.bytes_moved += pixels * 4
+            if pixels:
+                self._count()
+            photo = self.sheet_display
+        elif isinstance(image, DeltaFrame):
+            # 增量帧：在这只桌宠唯一的显示图像上应用脏矩形，切换动画时整帧铺满
+            if self.delta_display is None:
+                self.delta_display = DeltaDisplay(self.root)
+            calls, pixels = self.delta_display.show(image)
+            self.bytes_moved += pixels * 4
+            for _ in range(calls):
+                self._count()
+            photo = self.delta_display.photo
+        else:
+            # 整帧换成另一张PhotoImage，Tk重绘整帧
+            photo = image
+            self.bytes_moved += photo.width() * photo.height() * 4
+
+        if photo is not self.current_photo:
+            self.canvas.itemconfig(self.image_item, image=photo)
+            self.current_photo = photo
+            self._count()
+        return True
+
+    def set_bounds(self, box):
+        """把窗口收缩到帧内的 box 区域，图像相应向左上偏移；区域未变时不发送命令"""
+        if box == self.bounds:
+            return False
+        self.bounds = box
+        left, top, right, bottom = box
+        self.requested_size = (right - left, bottom - top)
+        self.canvas.configure(width=right - left, height=bottom - top)
+        self.canvas.coords(self.image_item, -left, -top)
+        self._count()
+        self._count()
+
+        # 尺寸和位置一起设置，等待中的移动也在这里应用
+        if self.pending_position is not None:
+            self.position, self.pending_position = self.pending_position, None
+        x, y = self.position or (0, 0)
+        self.root.geometry(f"{right - left}x{bottom - top}+{x + left}+{y + top}")
+        self.last_flush = time.monotonic()
+        self._count()
+        return True
+
+    @property
+    def window_area(self):
+        """窗口的像素数（合成器每帧需要处理的面积）"""
+        if self.bounds is None:
+            return 0
+        left, top, right, bottom = self.bounds
+        return (right - left) * (bottom - top)
+
+    def move(self, x, y):
+        """请求移动窗口，同一显示帧内的多次请求只应用最后一次"""
+        if self.pending_position is not None:
+            self.moves_coalesced += 1
+        self.pending_position = (int(x), int(y))
+        if self.flush_job is not None:
+            return
+
+        wait = self.last_flush + FRAME_INTERVAL - time.monotonic()
+        if wait <= 0:
+            self.flush()
+        else:
+            self.flush_job = self.event_loop.call_later(wait, self.flush)
+
+    def flush(self):
+        """应用等待中的窗口位置，位置未变时不发送任何命令"""
+        self.flush_job = None
+        position, self.pending_position = self.pending_position, None
+        if position is None or position == self.position:
+            return False
+        left, top = self.bounds[:2] if self.bounds else (0, 0)
+        self.root.geometry(f"+{position[0] + left}+{position[1] + top}")
+        self.position = position
+        self.last_flush = time.monotonic()
+        self._count()
+        return True
+
+    def close(self):
+        """取消等待中的移动（窗口即将销毁）"""
+        self.event_loop.cancel(self.flush_job)
+        self.flush_job = None
+        self.pending_position = None
+
+    def refresh_screen_size(self):
+        self.screen_size = (self.root.winfo_screenwidth(), self.root.winfo_screenheight())
+        self.screen_checked = time.monotonic()
+        self.screen_queries += 1
+
+    def check_screen_size(self):
+        """行为步进时调用：距上次读取超过 SCREEN_REFRESH_INTERVAL 才重新读取屏幕尺寸"""
+        if time.monotonic() - self.screen_checked >= SCREEN_REFRESH_INTERVAL:
+            self.refresh_screen_size()
+
+    def on_map(self, event):
+        """窗口重新显示（例如切换显示器或从最小化恢复）时刷新屏幕尺寸"""
+        if event.widget is self.root:
+            self.refresh_screen_size()
+
+    def on_configure(self, event):
+        """窗口尺寸被外部改变（例如换了屏幕或DPI），或窗口位置落到缓存的屏幕之外时刷新屏幕尺寸
+
+        拖动时每次移动都会触发 <Configure>，尺寸不变或正是 set_bounds 设置的尺寸、且位置仍在屏幕内时不查询。
+        """
+        if event.widget is not self.root:
+            return
+        size = (event.width, event.height)
+        resized = size != self.window_size and size != self.requested_size
+        self.window_size = size
+        screen_width, screen_height = self.screen_size
+        outside = not (0 <= event.x < screen_width and 0 <= event.y < screen_height)
+        if resized or outside:
+            self.refresh_screen_size()
+
+    def _count(self):
+        self.tick_calls += 1
+        self.total_calls += 1
+
+    def end_tick(self):
+        """一个动画tick结束，记录本tick的Tcl调用数"""
+        self.calls_history.append(self.tick_calls)
+        self.ticks += 1
+        self.tick_calls = 0
+
+    @property
+    def calls_per_tick(self):
+        """最近若干tick的平均Tcl调用数"""
+        if not self.calls_history:
+            return 0.0
+        return sum(self.calls_history) / len(self.calls_history)
+
+    @property
+    def idle_ratio(self):
+        """最近若干tick中没有发出任何Tcl调用的比例"""
+        if not self.calls_history:
+            return 0.0
+        return self.calls_history.count(0) / len(self.calls_history)
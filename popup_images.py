@@ -0,0 +1,123 @@
+"""弹窗图片的后台加载和缓存
+
+图片的解码和LANCZOS缩放在后台线程完成，结果经事件循环交回Tk线程（不轮询），
+Tk线程只负责创建PhotoImage，动画不会卡顿。
+结果按 (路径, 目标尺寸, 文件修改时间) 缓存：重复打开时直接复用，文件变化后才重新加载。
+图片也可以是桌宠包中的条目（pet_pack.PackEntry），按包文件和条目名缓存。
+"""
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageTk
+
+
+def fit_size(size, target_size):
+    """保持宽高比缩放到 target_size 以内"""
+    width, height = size
+    image_ratio = width / height
+    target_ratio = target_size[0] / target_size[1]
+    if image_ratio > target_ratio:
+        # 宽度是限制因素
+        return target_size[0], max(1, int(target_size[0] / image_ratio))
+    # 高度是限制因素
+    return max(1, int(target_size[1] * image_ratio)), target_size[1]
+
+
+def load_fitted(path, target_size):
+    """读取图片并按比例缩放（不涉及Tk，可在后台线程运行）"""
+    with Image.open(path.open() if hasattr(path, "open") else path) as image:
+        image = image.convert("RGBA")  # 确保有alpha通道
+    return image.resize(fit_size(image.size, target_size), Image.LANCZOS)
+
+
+class PopupImageCache:
+    def __init__(self, master, event_loop, max_entries=4):
+        self.master = master
+        self.event_loop = event_loop
+        self.max_entries = max_entries
+        self.images = OrderedDict()  # 键 -> PIL图像（后台线程的结果）
+        self.photos = {}  # 键 -> PhotoImage（Tk线程上按需创建）
+        self.pending = {}  # 键 -> (Future, [(回调, 出错回调)])
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="popup-image")
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def cache_key(path, target_size):
+        if hasattr(path, "cache_id"):
+            name, mtime_ns, size = path.cache_id
+            return name, tuple(target_size), mtime_ns, size
+        stat = os.stat(path)
+        return os.path.abspath(path), tuple(target_size), stat.st_mtime_ns, stat.st_size
+
+    def prefetch(self, path, target_size):
+        """提前在后台加载，第一次打开时也不用等待"""
+        try:
+            key = self.cache_key(path, target_size)
+        except OSError:
+            return
+        if key not in self.images and key not in self.pending:
+            self.submit(key, path, target_size)
+
+    def get(self, path, target_size, callback, error_callback):
+        """在Tk线程上以PhotoImage调用callback；缓存命中时立即调用，否则加载完成后调用"""
+        try:
+            key = self.cache_key(path, target_size)
+        except OSError as e:
+            error_callback(e)
+            return
+
+        if key in self.images:
+            self.hits += 1
+            self.images.move_to_end(key)
+            callback(self.photo(key))
+            return
+
+        self.misses += 1
+        if key not in self.pending:
+            self.submit(key, path, target_size)
+        self.pending[key][1].append((callback, error_callback))
+
+    def submit(self, key, path, target_size):
+        future = self.executor.submit(load_fitted, path, target_size)
+        self.pending[key] = (future, [])
+        future.add_done_callback(lambda done: self.event_loop.call_soon_threadsafe(self.finish, key, done))
+
+    def finish(self, key, future):
+        """Tk线程：加载完成，缓存结果并通知等待的回调"""
+        entry = self.pending.get(key)
+        if entry is None or entry[0] is not future:
+            return
+        del self.pending[key]
+        waiters = entry[1]
+        try:
+            image = future.result()
+        except Exception as e:
+            for _, error_callback in waiters:
+                error_callback(e)
+            return
+
+        self.store(key, image)
+        for callback, _ in waiters:
+            callback(self.photo(key))
+
+    def store(self, key, image):
+        # 同一路径和尺寸只保留最新版本的文件
+        for old in [k for k in self.images if k[:2] == key[:2]]:
+            del self.images[old]
+            self.photos.pop(old, None)
+        self.images[key] = image
+        while len(self.images) > self.max_entries:
+            old, _ = self.images.popitem(last=False)
+            self.photos.pop(old, None)
+
+    def photo(self, key):
+        photo = self.photos.get(key)
+        if photo is None:
+            photo = self.photos[key] = ImageTk.PhotoImage(self.images[key], master=self.master)
+        return photo
+
+    def shutdown(self):
+        self.pending.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
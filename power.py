@@ -0,0 +1,130 @@
+"""省电调度
+
+根据窗口和用户状态决定桌宠的刷新频率：
+  - active：正常按帧时长播放动画，行为按固定间隔步进；
+  - idle：用户一段时间没有操作，动画降到低帧率，桌宠停止走动；
+  - hidden：窗口未映射或被完全遮挡，动画暂停，行为只在切换状态时醒来。
+鼠标进入桌宠或与之交互时立即恢复全速；窗口重新可见时（无论恢复为active还是idle）立即重新启动暂停的动画。
+定时器唤醒次数由事件循环（event_loop.py）统计。
+"""
+import sys
+import time
+
+# 用户无操作多久后进入idle（秒），0表示不检测
+IDLE_TIMEOUT = 300
+# idle时动画的最小帧间隔（毫秒）
+IDLE_FRAME_MS = 500
+# 非Windows系统上采样鼠标位置判断用户活动的最小间隔（秒）
+POINTER_SAMPLE_INTERVAL = 1.0
+
+ACTIVE = "active"
+IDLE = "idle"
+HIDDEN = "hidden"
+
+
+def system_idle_seconds():
+    """Windows下读取系统级的无输入时间，其他系统返回None"""
+    if sys.platform != "win32":
+        return None
+    import ctypes
+
+    class LASTINPUTINFO(ctypes.Structure):
+        _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
+
+    info = LASTINPUTINFO()
+    info.cbSize = ctypes.sizeof(info)
+    if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+        return None
+    return ((ctypes.windll.kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF) / 1000
+
+
+class PowerMonitor:
+    def __init__(self, window, surface=None, idle_timeout=IDLE_TIMEOUT, on_wake=None):
+        self.window = window
+        # 以这个控件的可见性判断是否被遮挡（一般是显示桌宠的画布）
+        self.surface = surface or window
+        self.idle_timeout = idle_timeout
+        # 需要立即重新调度时调用：动画暂停后窗口重新可见，或从降频状态恢复为active
+        self.on_wake = on_wake
+
+        self.mapped = True
+        self.obscured = False
+        self.last_input = time.monotonic()
+        self.last_pointer = None
+        self.last_pointer_sample = 0.0
+        # 动画调度最近一次使用的模式（frame_delay 记录），以及动画是否因隐藏而暂停（没有登记下一帧）
+        self.scheduled_mode = ACTIVE
+        self.suspended = False
+
+        window.bind("<Map>", self.on_map, add="+")
+        window.bind("<Unmap>", self.on_unmap, add="+")
+        self.surface.bind("<Visibility>", self.on_visibility, add="+")
+        # 顶层窗口的绑定对其中所有控件都生效
+        for sequence in ("<Enter>", "<Motion>", "<ButtonPress>"):
+            window.bind(sequence, self.poke, add="+")
+
+    def on_map(self, event):
+        if event.widget is self.window:
+            self.mapped = True
+            self.check_wake()
+
+    def on_unmap(self, event):
+        if event.widget is self.window:
+            self.mapped = False
+
+    def on_visibility(self, event):
+        if event.widget is not self.surface:
+            return
+        self.obscured = event.state == "VisibilityFullyObscured"
+        self.check_wake()
+
+    def poke(self, event=None):
+        """鼠标交互：记为用户活动，需要时立即恢复全速"""
+        self.last_input = time.monotonic()
+        if self.suspended or self.scheduled_mode != ACTIVE:
+            self.check_wake()
+
+    def check_wake(self):
+        """离开hidden时重新启动暂停的动画；降频调度中的桌宠变为active时恢复全速"""
+        mode = self.mode()
+        if mode == HIDDEN:
+            return
+        if self.suspended or (mode == ACTIVE and self.scheduled_mode != ACTIVE):
+            self.suspended = False
+            self.scheduled_mode = mode
+            if self.on_wake is not None:
+                self.on_wake()
+
+    def idle_seconds(self):
+        """用户无操作的时间：Windows读取系统值，其他系统按鼠标位置是否变化估计"""
+        now = time.monotonic()
+        idle = system_idle_seconds()
+        if idle is not None:
+            return min(idle, now - self.last_input)
+
+        if now - self.last_pointer_sample >= POINTER_SAMPLE_INTERVAL:
+            self.last_pointer_sample = now
+            pointer = self.window.winfo_pointerxy()
+            if pointer != self.last_pointer:
+                self.last_pointer = pointer
+                self.last_input = now
+        return now - self.last_input
+
+    def mode(self):
+        """当前模式（只读取状态，不影响调度）"""
+        if not self.mapped or self.obscured:
+            return HIDDEN
+        if self.idle_timeout and self.idle_seconds() >= self.idle_timeout:
+            return IDLE
+        return ACTIVE
+
+    def frame_delay(self, delay_ms, mode=None):
+        """按当前模式调整下一帧的延迟（毫秒），返回None表示暂停动画（记为 suspended，直到 check_wake 唤醒）"""
+        mode = mode or self.mode()
+        self.scheduled_mode = mode
+        self.suspended = mode == HIDDEN
+        if mode == HIDDEN:
+            return None
+        if mode == IDLE:
+            return max(delay_ms, IDLE_FRAME_MS)
+        return delay_ms
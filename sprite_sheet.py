@@ -0,0 +1,208 @@
+"""精灵图集（sprite sheet）
+
+离线工具把所有状态的帧打包进一张PNG图集，并生成同名的JSON索引，
+记录每帧在图集中的矩形区域和显示时长。运行时只加载一张图集，
+再把当前帧的区域复制到一个显示用的PhotoImage上，而不是为每一帧创建单独的图像。
+索引中还记录每帧相对前一帧变化的矩形，增量模式下连续播放时只复制这一小块。
+连续的重复帧合并为一帧（时长相加），内容相同的帧（包括不同状态之间）共用图集中的同一格。
+
+用法: python sprite_sheet.py [-o pet_sheet.png] [--size 120] [--workers N] [--dedup-threshold 0]
+"""
+import argparse
+import json
+import math
+import os
+import time
+import tkinter as tk
+
+from PIL import Image, ImageTk
+
+from gif_frames import alpha_bounds, delta_boxes, frame_digest, frame_duration, merge_duplicate_frames
+from parallel_decode import ParallelDecoder
+from pet_assets import ANIMATION_FILES
+
+SHEET_VERSION = 1
+DEFAULT_SHEET = "pet_sheet.png"
+
+
+def index_path(sheet_path):
+    """图集对应的JSON索引路径"""
+    return os.path.splitext(sheet_path)[0] + ".json"
+
+
+def build_sheet(animations, dedup_threshold=0):
+    """把 {状态: RGBA帧列表} 按网格打包，返回 (图集图像, 索引)
+
+    每个状态先合并连续的重复帧，内容相同的帧只占一格；合并的统计写入索引的 "dedup"。
+    """
+    dedup = {}
+    merged = {}
+    for state, frames in animations.items():
+        merged[state], dedup[state] = merge_duplicate_frames(frames, dedup_threshold)
+    # 帧内容哈希 -> 帧，同样内容只打包一次
+    unique = {}
+    digests = {state: [frame_digest(frame) for frame in frames] for state, frames in merged.items()}
+    for state, frames in merged.items():
+        for digest, frame in zip(digests[state], frames):
+            unique.setdefault(digest, frame)
+    if not unique:
+        raise ValueError("没有可打包的帧")
+
+    cell_width = max(frame.width for frame in unique.values())
+    cell_height = max(frame.height for frame in unique.values())
+    columns = math.ceil(math.sqrt(len(unique)))
+    rows = math.ceil(len(unique) / columns)
+
+    sheet = Image.new("RGBA", (columns * cell_width, rows * cell_height), (0, 0, 0, 0))
+    index = {"version": SHEET_VERSION, "frame_size": [cell_width, cell_height],
+             "states": {}, "bounds": {}, "deltas": {}, "dedup": dedup, "cells": len(unique)}
+
+    cells = {}  # 帧内容哈希 -> 图集中的位置
+    for slot, (digest, frame) in enumerate(unique.items()):
+        cells[digest] = ((slot % columns) * cell_width, (slot // columns) * cell_height)
+        sheet.paste(frame.convert("RGBA"), cells[digest])
+
+    for state, frames in merged.items():
+        entries = []
+        for digest, frame in zip(digests[state], frames):
+            x, y = cells[digest]
+            entries.append({"x": x, "y": y, "w": frame.width, "h": frame.height,
+                            "duration": frame_duration(frame)})
+        index["states"][state] = entries
+        # 每个状态所有帧不透明区域的并集，运行时窗口按它收缩
+        index["bounds"][state] = list(alpha_bounds(frames)) if frames else [0, 0, cell_width, cell_height]
+        # 每帧相对前一帧（帧内坐标）变化的矩形，没有变化时为null
+        index["deltas"][state] = [list(box) if box else None for box in delta_boxes(frames)]
+
+    return sheet, index
+
+
+def save_sheet(sheet, index, sheet_path):
+    sheet.save(sheet_path, format="PNG")
+    with open(index_path(sheet_path), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+
+
+def load_sheet(sheet_path):
+    """读取图集和索引，返回 (RGBA图集图像, 索引)"""
+    with open(index_path(sheet_path), encoding="utf-8") as f:
+        index = json.load(f)
+    if index.get("version") != SHEET_VERSION:
+        raise ValueError(f"不支持的图集版本: {index.get('version')}")
+
+    sheet = Image.open(sheet_path)
+    sheet.load()
+    return sheet.convert("RGBA"), index
+
+
+class SheetFrame:
+    """图集中的一帧：只记录矩形区域，不持有像素
+
+    增量模式下 previous 是播放顺序中的前一帧，delta 是相对它变化的矩形（帧内坐标，没有变化时为None）。
+    """
+    __slots__ = ("sheet", "box", "duration", "previous", "delta")
+
+    def __init__(self, sheet, box, duration):
+        self.sheet = sheet
+        self.box = box
+        self.duration = duration
+        self.previous = None
+        self.delta = None
+
+    @property
+    def size(self):
+        return self.box[2] - self.box[0], self.box[3] - self.box[1]
+
+
+class TkSpriteSheet:
+    """Tk端的图集：整张图集只创建一个PhotoImage
+
+    每个显示位置（每只桌宠）用 new_display() 创建自己的帧大小显示图像。
+    """
+
+    def __init__(self, master, sheet, index, delta=False):
+        self.master = master
+        self.photo = ImageTk.PhotoImage(sheet, master=master)
+        self.frame_size = tuple(index["frame_size"])
+        self.states = {
+            state: [SheetFrame(self, (e["x"], e["y"], e["x"] + e["w"], e["y"] + e["h"]), e["duration"])
+                    for e in entries]
+            for state, entries in index["states"].items()
+        }
+        # 旧图集的索引中没有包围盒时，从图集像素计算
+        self.bounds = {state: tuple(box) for state, box in index.get("bounds", {}).items()}
+        for state, entries in index["states"].items():
+            if state not in self.bounds and entries:
+                self.bounds[state] = alpha_bounds([sheet.crop((e["x"], e["y"], e["x"] + e["w"], e["y"] + e["h"]))
+                                                   for e in entries])
+        if delta:
+            self.link_deltas(sheet, index.get("deltas", {}))
+
+    def link_deltas(self, sheet, deltas):
+        """记录每帧的前一帧和变化矩形；旧图集的索引中没有时从图集像素计算"""
+        for state, frames in self.states.items():
+            boxes = deltas.get(state)
+            if boxes is None or len(boxes) != len(frames):
+                boxes = delta_boxes([sheet.crop(frame.box) for frame in frames])
+            for frame, previous, box in zip(frames, frames[-1:] + frames[:-1], boxes):
+                frame.previous = previous
+                frame.delta = tuple(box) if box else None
+
+    @classmethod
+    def open(cls, master, sheet_path, delta=False):
+        sheet, index = load_sheet(sheet_path)
+        return cls(master, sheet, index, delta)
+
+    def new_display(self, master=None):
+        """创建一个帧大小的显示图像"""
+        width, height = self.frame_size
+        return tk.PhotoImage(master=master or self.master, width=width, height=height)
+
+    def blit(self, frame, display, shown=None):
+        """把指定帧复制到显示图像上（至多一次Tcl调用），返回复制的像素数
+
+        shown 是显示图像上当前的帧，正好是 frame 的前一帧时只复制变化的矩形。
+        """
+        if shown is not None and shown is frame.previous:
+            if frame.delta is None:
+                return 0
+            left, top, right, bottom = frame.delta
+            x, y = frame.box[:2]
+            display.tk.call(display, "copy", self.photo, "-from", x + left, y + top, x + right, y + bottom,
+                            "-to", left, top, "-compositingrule", "set")
+            return (right - left) * (bottom - top)
+
+        display.tk.call(display, "copy", self.photo, "-from", *frame.box,
+                        "-to", 0, 0, "-compositingrule", "set")
+        width, height = frame.size
+        return width * height
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把所有状态的GIF打包为精灵图集")
+    parser.add_argument("-o", "--output", default=DEFAULT_SHEET, help="输出的PNG图集路径")
+    parser.add_argument("--size", type=int, default=120, help="每帧边长")
+    parser.add_argument("--workers", type=int, default=None, help="预处理进程数")
+    parser.add_argument("--dedup-threshold", type=float, default=0,
+                        help="近似重复帧的合并阈值（各通道平均差异0-255，0为只合并完全相同的帧）")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    decoder = ParallelDecoder(args.workers)
+    try:
+        decoded = decoder.decode_many(list(ANIMATION_FILES.values()), (args.size, args.size))
+    finally:
+        decoder.shutdown()
+    animations = {state: decoded[path] for state, path in ANIMATION_FILES.items()}
+
+    sheet, index = build_sheet(animations, args.dedup_threshold)
+    save_sheet(sheet, index, args.output)
+    for state, stats in index["dedup"].items():
+        print(f"{state}: {stats['kept']} 帧 (原 {stats['frames']} 帧，节省 {stats['bytes_saved'] / 1024:.1f}KB)")
+    print(f"共 {index['cells']} 格（不同状态中相同的帧共用一格）")
+    print(f"图集 {sheet.width}x{sheet.height} 已写入 {args.output} "
+          f"({os.path.getsize(args.output) / 1024:.1f}KB), 耗时 {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
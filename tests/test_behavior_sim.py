@@ -0,0 +1,138 @@
+"""behavior_sim.BehaviorEngine 的回放测试
+
+同一个 seed 两次运行的轨迹必须完全相同；给 DesktopPet.step_behavior 和批量模拟喂同样的随机数时，
+状态切换和位置限制的结果必须一致。
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import main  # noqa: E402
+from behavior_sim import BehaviorEngine  # noqa: E402
+from pet_behavior import BEHAVIOR_STATES, DANCE_STEP, EDGE_MARGIN, WALK_STEP  # noqa: E402
+from power import ACTIVE  # noqa: E402
+
+SCREEN = (800, 600)
+
+
+def test_same_seed_replays_identically():
+    first = BehaviorEngine(50, SCREEN, seed=7, state_change_time=1.0).run(100, record=True)
+    second = BehaviorEngine(50, SCREEN, seed=7, state_change_time=1.0).run(100, record=True)
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a, b)
+
+
+class ScriptedRng:
+    """按步数和桌宠编号从预先生成的表中取随机数，代替 numpy Generator"""
+
+    def __init__(self, engine, tables):
+        self.engine = engine
+        self.tables = tables
+        self.dance_draws = 0
+
+    def integers(self, low, high, size):
+        step = self.engine.steps - 1
+        if (low, high) == (1, len(BEHAVIOR_STATES)):
+            return self.tables["shift"][step]
+        if (low, high) == (-WALK_STEP, WALK_STEP + 1):
+            return self.tables["walk"][step]
+        self.dance_draws += 1
+        return self.tables["dance_x" if self.dance_draws % 2 else "dance_y"][step]
+
+
+class ScriptedRandom:
+    """同一张表，以 random 模块的接口交给 DesktopPet.step_behavior"""
+
+    def __init__(self, pet, tables, index):
+        self.pet = pet
+        self.tables = tables
+        self.index = index
+        self.step = 0
+        self.dance_draws = 0
+
+    def choice(self, states):
+        shift = self.tables["shift"][self.step][self.index]
+        state = BEHAVIOR_STATES[(BEHAVIOR_STATES.index(self.pet.state) + shift) % len(BEHAVIOR_STATES)]
+        assert state in states
+        return state
+
+    def randint(self, low, high):
+        if high == WALK_STEP:
+            return int(self.tables["walk"][self.step][self.index])
+        self.dance_draws += 1
+        table = "dance_x" if self.dance_draws % 2 else "dance_y"
+        return int(self.tables[table][self.step][self.index])
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+class StubRenderer:
+    screen_size = SCREEN
+
+    def move(self, x, y):
+        pass
+
+
+class StubPower:
+    def mode(self):
+        return ACTIVE
+
+
+class StubPet:
+    """只带 step_behavior 用到的属性；包围盒取 EDGE_MARGIN，使限制范围与批量模拟相同"""
+    step_behavior = main.DesktopPet.step_behavior
+    move_randomly = main.DesktopPet.move_randomly
+    dance_randomly = main.DesktopPet.dance_randomly
+    clamp_position = main.DesktopPet.clamp_position
+
+    def __init__(self, state_change_time):
+        self.x, self.y = 500, 500
+        self.state = "sing"
+        self.is_dragging = False
+        self.last_state_change = 0.0
+        self.state_change_time = state_change_time
+        self.sprite_box = (0, 0, EDGE_MARGIN, EDGE_MARGIN)
+        self.renderer = StubRenderer()
+        self.power = StubPower()
+
+    def play_animation(self, state, start=None):
+        pass
+
+
+def test_engine_matches_desktop_pet(monkeypatch):
+    count, steps, state_change_time = 4, 200, 1.0
+    rng = np.random.default_rng(3)
+    tables = {
+        "shift": rng.integers(1, len(BEHAVIOR_STATES), size=(steps, count)),
+        "walk": rng.integers(-WALK_STEP, WALK_STEP + 1, size=(steps, count)),
+        "dance_x": rng.integers(-DANCE_STEP, DANCE_STEP + 1, size=(steps, count)),
+        "dance_y": rng.integers(-DANCE_STEP, DANCE_STEP + 1, size=(steps, count)),
+    }
+    engine = BehaviorEngine(count, SCREEN, state_change_time=state_change_time)
+    engine.rng = ScriptedRng(engine, tables)
+    xs, ys, states = engine.run(steps, record=True)
+
+    clock = Clock()
+    monkeypatch.setattr(main, "time", clock)
+    pets = [StubPet(state_change_time) for _ in range(count)]
+    randoms = [ScriptedRandom(pet, tables, index) for index, pet in enumerate(pets)]
+    for step in range(steps):
+        # 与批量模拟同样的方式累加时间，比较边界时不会有浮点差异
+        clock.now += engine.interval
+        for index, pet in enumerate(pets):
+            randoms[index].step = step
+            monkeypatch.setattr(main, "random", randoms[index])
+            pet.step_behavior()
+            assert (pet.x, pet.y) == (xs[step][index], ys[step][index])
+            assert pet.state == BEHAVIOR_STATES[states[step][index]]
+
+    # 走到过屏幕边缘，说明限制确实被比较过
+    assert (xs == 0).any() or (xs == SCREEN[0] - EDGE_MARGIN).any()
@@ -0,0 +1,96 @@
+"""event_loop.EventLoop 的调度顺序测试
+
+用假时钟和只记录 after() 调用的假Tk根窗口，直接调用 run_due()。
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from event_loop import COMPACT_SIZE, EventLoop  # noqa: E402
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubRoot:
+    """只记录挂上的Tk定时器，不真正调度"""
+
+    def __init__(self):
+        self.jobs = []
+
+    def bind(self, sequence, func, add=None):
+        pass
+
+    def after(self, ms, func):
+        self.jobs.append(ms)
+        return f"after#{len(self.jobs)}"
+
+    def after_cancel(self, job):
+        pass
+
+    def report_callback_exception(self, *exc_info):
+        raise exc_info[1]
+
+
+def make_loop():
+    clock = Clock()
+    return EventLoop(StubRoot(), clock=clock), clock
+
+
+def test_runs_due_tasks_by_deadline_then_registration_order():
+    loop, clock = make_loop()
+    order = []
+    loop.call_at(2.0, order.append, "late")
+    loop.call_at(1.0, order.append, "first")
+    loop.call_at(1.0, order.append, "second")
+    loop.call_at(0.5, order.append, "earliest")
+    loop.call_at(3.0, order.append, "not due")
+
+    clock.now = 2.0
+    assert loop.run_due() == 4
+    assert order == ["earliest", "first", "second", "late"]
+    # 没到期的任务不会提前执行，Tk定时器对准它的截止时间
+    assert [timer.due for timer in loop.queue] == [3.0]
+    assert loop.root.jobs[-1] == 1000
+
+
+def test_tasks_registered_during_a_batch_run_on_the_next_tick():
+    loop, clock = make_loop()
+    order = []
+
+    def reschedule():
+        order.append("tick")
+        loop.call_soon(reschedule)
+
+    loop.call_soon(reschedule)
+    loop.call_soon(order.append, "other")
+    assert loop.run_due() == 2
+    assert order == ["tick", "other"]
+    assert len(loop.queue) == 1
+
+    assert loop.run_due() == 1
+    assert order == ["tick", "other", "tick"]
+    assert loop.wakeups == 2
+
+
+def test_cancelled_timers_are_compacted():
+    loop, clock = make_loop()
+    timers = [loop.call_at(10.0 + i, lambda: None) for i in range(COMPACT_SIZE)]
+    for timer in timers[: COMPACT_SIZE // 2 + 1]:
+        timer.cancel()
+    assert loop.cancelled_count == COMPACT_SIZE // 2 + 1
+
+    ran = []
+    loop.call_at(1.0, ran.append, True)
+    assert loop.cancelled_count == 0
+    assert len(loop.queue) == COMPACT_SIZE - (COMPACT_SIZE // 2 + 1) + 1
+    assert not any(timer.cancelled() for timer in loop.queue)
+
+    clock.now = 1.0
+    assert loop.run_due() == 1
+    assert ran == [True]